@@ -0,0 +1,288 @@
+"""
+文档生成流水线基准测试
+
+生成合成的Word模板和Excel数据，无交互地运行 WordHandler.process_documents、
+ExcelHandler 读取和 PDFConverter.convert_all，输出吞吐量、单行耗时分位数和峰值内存，
+以及各处理路径的模块导入耗时，结果保存为JSON以便在不同版本之间比较。
+
+用法:
+    python benchmarks/bench_pipeline.py --rows 1000 10000 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+SUITES = ('excel', 'word', 'pdf')
+
+
+def make_items(count):
+    """生成替换项名称（包含互为前缀的名称）"""
+    items = []
+    for i in range(count):
+        items.append(f'字段{i}')
+        if i % 5 == 0 and len(items) < count:
+            items.append(f'字段{i}大写')
+    return items[:count]
+
+
+def make_template(path, items, paragraphs, table_rows, table_cols, seed=0):
+    """生成合成Word模板：正文段落、表格，替换项分布其中（部分跨run）"""
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    for i in range(paragraphs):
+        item = items[i % len(items)]
+        paragraph = doc.add_paragraph(f'第{i}段 说明文字 ')
+        if i % 3 == 0:
+            # 替换项被拆分到两个run中
+            half = len(item) // 2
+            paragraph.add_run(item[:half])
+            paragraph.add_run(item[half:]).bold = True
+        else:
+            paragraph.add_run(item)
+        paragraph.add_run(' 结束' * rng.randint(1, 5))
+    if table_rows and table_cols:
+        table = doc.add_table(rows=table_rows, cols=table_cols)
+        for r in range(table_rows):
+            for c in range(table_cols):
+                table.cell(r, c).text = items[(r * table_cols + c) % len(items)]
+    doc.save(path)
+
+
+def make_workbook(path, items, rows, seed=0):
+    """生成合成Excel数据（写入模式，内存占用与行数无关）"""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(items)
+    for row in range(rows):
+        # 前两列用于生成文件名，不留空
+        sheet.append([
+            None if col > 1 and rng.random() < 0.05 else f'值{row}_{col}_{rng.randint(0, 999)}'
+            for col in range(len(items))
+        ])
+    workbook.save(path)
+
+
+def make_config(template_path, output_dir, items, args):
+    """构造测试配置（不读取也不保存config.json，其余设置使用默认值）"""
+    from src.config import Config
+
+    config = Config(load_saved=False)
+    config.word_template = template_path
+    config.output_dir = output_dir
+    config.replace_items = ['；'.join(items)]
+    config.output_format = f'{items[0]}_{items[1]}'
+    config.excel_path = os.path.join(output_dir, 'template.xlsx')
+    config.font_color = 'red'
+    config.render_engine = args.engine
+    config.chunk_size = 1000
+    config.workers = args.workers
+    config.incremental = False
+    config.output_mode = 'files'
+    config.archive_name = 'documents.zip'
+    config.pdf_output = 'off'
+    # 不使用渲染缓存：每行都经过渲染并直接写盘，单行耗时包含写盘且不受重复行影响
+    config.render_cache_entries = 0
+    return config
+
+
+def percentile(values, fraction):
+    """计算分位数（最近秩法）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(rows, elapsed, latencies):
+    """汇总吞吐量和单行耗时"""
+    return {
+        'rows': rows,
+        'seconds': round(elapsed, 4),
+        'rows_per_second': round(rows / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+    }
+
+
+def run_case(case):
+    """在独立子进程中执行的单个测试用例"""
+    import contextlib
+    from src.excel_handler import ExcelHandler
+    from src.word_handler import WordHandler
+    from src.pipeline import RowRenderer
+
+    args = argparse.Namespace(**case['args'])
+    items = case['items']
+    output_dir = case['output_dir']
+    config = make_config(case['template'], output_dir, items, args)
+    latencies = []
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        start = time.perf_counter()
+        if case['suite'] == 'excel':
+            _, _, chunks = ExcelHandler(config).stream_data()
+            rows = 0
+            for chunk in chunks:
+                rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            read_start = time.perf_counter()
+            df = ExcelHandler(config).read_data()
+            result = summarize(rows, elapsed, [])
+            result['read_data_seconds'] = round(time.perf_counter() - read_start, 4)
+            result['read_data_rows'] = len(df)
+        elif case['suite'] == 'word':
+            # 串行模式下记录每行的渲染和写盘耗时
+            render = RowRenderer.render
+
+            def timed_render(self, job):
+                begin = time.perf_counter()
+                try:
+                    return render(self, job)
+                finally:
+                    latencies.append(time.perf_counter() - begin)
+
+            RowRenderer.render = timed_render
+            handler = WordHandler(config)
+            handler.process_documents()
+            result = summarize(handler.stats['rendered'], time.perf_counter() - start, latencies)
+            result['failed'] = handler.stats['failed']
+        else:
+            from src.pdf_converter import PDFConverter
+            results = PDFConverter(config).convert_all(workers=args.workers)
+            latencies = [seconds for _, seconds, error in results if error is None]
+            result = summarize(len(latencies), time.perf_counter() - start, latencies)
+            result['failed'] = len(results) - len(latencies)
+
+    try:
+        import resource
+    except ImportError:
+        # Windows没有resource模块，不统计峰值内存
+        result['peak_rss_mb'] = None
+        return result
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux上单位为KB，macOS上为字节
+    scale = 1 if platform.system() == 'Darwin' else 1024
+    result['peak_rss_mb'] = round(max(usage, children) * scale / 1024 / 1024, 1)
+    return result
+
+
+def prepare(work_dir, rows, args):
+    """准备（或复用）合成模板和数据"""
+    items = make_items(args.placeholders)
+    tag = f'p{args.paragraphs}_t{args.table}_k{args.placeholders}'
+    template = os.path.join(work_dir, f'template_{tag}.docx')
+    if not os.path.exists(template):
+        table_rows, table_cols = (int(n) for n in args.table.lower().split('x'))
+        make_template(template, items, args.paragraphs, table_rows, table_cols, args.seed)
+
+    output_dir = os.path.join(work_dir, f'rows{rows}_{tag}')
+    os.makedirs(output_dir, exist_ok=True)
+    workbook = os.path.join(output_dir, 'template.xlsx')
+    if not os.path.exists(workbook):
+        make_workbook(workbook, items, rows, args.seed)
+    return items, template, output_dir
+
+
+def run_subprocess(case):
+    """在子进程中运行用例，保证峰值内存互不影响"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(case, f, ensure_ascii=False)
+        case_path = f.name
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--case', case_path],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            return {'error': completed.stderr.strip().splitlines()[-1:] or ['未知错误']}
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        os.remove(case_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='文档生成流水线基准测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000], help='Excel数据行数（可指定多个）')
+    parser.add_argument('--paragraphs', type=int, default=50, help='模板正文段落数')
+    parser.add_argument('--table', default='10x4', help='模板表格大小，行x列')
+    parser.add_argument('--placeholders', type=int, default=20, help='替换项数量')
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES), help='要运行的测试')
+    parser.add_argument('--engine', choices=['auto', 'xml', 'docx'], default='auto', help='渲染引擎')
+    parser.add_argument('--workers', type=int, default=1, help='工作进程数')
+    parser.add_argument('--pdf-limit', type=int, default=200, help='PDF测试最多转换的文件数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'excel2word_bench'),
+                        help='合成数据和输出文件目录')
+    parser.add_argument('--output', default=None, help='结果JSON文件路径')
+    parser.add_argument('--case', default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.case:
+        with open(args.case, 'r', encoding='utf-8') as f:
+            print(json.dumps(run_case(json.load(f)), ensure_ascii=False))
+        return
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    case_args = {
+        key: value for key, value in vars(args).items()
+        if key in ('engine', 'workers', 'paragraphs', 'table', 'placeholders', 'seed')
+    }
+    results = []
+    for rows in args.rows:
+        items, template, output_dir = prepare(args.work_dir, rows, args)
+        for suite in args.suites:
+            case_dir = output_dir
+            if suite == 'pdf':
+                # PDF测试只转换有限数量的文件
+                case_dir = os.path.join(output_dir, 'pdf')
+                os.makedirs(case_dir, exist_ok=True)
+                docx_files = sorted(f for f in os.listdir(output_dir) if f.endswith('.docx'))
+                for name in docx_files[:args.pdf_limit]:
+                    target = os.path.join(case_dir, name)
+                    if not os.path.exists(target):
+                        os.link(os.path.join(output_dir, name), target)
+            case = {'suite': suite, 'items': items, 'template': template,
+                    'output_dir': case_dir, 'args': case_args}
+            result = run_subprocess(case)
+            result.update({'suite': suite, 'input_rows': rows})
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False))
+
+    from src.import_report import import_report
+    startup = import_report()
+    print(json.dumps({module: result['ms'] for module, result in startup.items()}, ensure_ascii=False))
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'case'},
+        'results': results,
+        'import_ms': startup,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,12 @@
 import os
 import sys
-import pandas as pd
+import json
+import argparse
+import contextlib
 from src.config import Config
 from src.excel_handler import ExcelHandler
-from src.word_handler import WordHandler
 from src.utils import clear_screen, validate_path
+from src.sharding import parse_shard, merge_shards
 
 EXCEL_TEMPLATE_NAME = 'template.xlsx'
 output_DIR_NAME = 'output'
@@ -14,6 +16,7 @@ class DocumentProcessor:
         self.config = Config()
         self.excel_handler = None
         self.word_handler = None
+        self.status_cache = {}  # 文件路径 -> ((修改时间, 大小), 状态)
 
     def show_menu(self):
         while True:
@@ -23,6 +26,8 @@ class DocumentProcessor:
             # 显示当前配置状态
             if self.config.word_template:
                 print(f"[已配置] Word模板: {self.config.word_template}")
+                for template in self.config.extra_templates or []:
+                    print(f"[已配置] 附加模板: {template['word_template']}（文件名格式: {template['output_format']}）")
                 # 显示输出目录
                 if self.config.output_dir:
                     excel_path = os.path.join(self.config.output_dir, EXCEL_TEMPLATE_NAME)
@@ -31,23 +36,34 @@ class DocumentProcessor:
                     # 显示items.txt状态
                     if os.path.exists(items_path):
                         try:
-                            with open(items_path, 'r', encoding='utf-8') as f:
-                                items = [i.strip() for i in f.read().split('；') if i.strip()]
-                                if items:
-                                    print(f"[已配置] 待替换项: {len(items)}项 ({items_path})")
-                                else:
-                                    print(f"[未配置] 待替换项为空 ({items_path})")
+                            items_count = self._cached_status(items_path, self._read_items_count)
+                            if items_count:
+                                print(f"[已配置] 待替换项: {items_count}项 ({items_path})")
+                            else:
+                                print(f"[未配置] 待替换项为空 ({items_path})")
                         except Exception:
                             print(f"[错误] 无法读取待替换项 ({items_path})")
                     
+                    # 配置了其他数据源时显示数据源状态
+                    if self.config.data_source:
+                        data_path = self.config.data_source
+                        try:
+                            columns, total_rows = self._cached_status(
+                                data_path, ExcelHandler(self.config).read_header)
+                            rows_text = f"{total_rows}行" if total_rows is not None else "行数未知"
+                            print(f"[已配置] 数据源: {len(columns)}项，{rows_text} ({data_path})")
+                        except Exception:
+                            print(f"[错误] 数据源读取失败 ({data_path})")
                     # 显示Excel状态
-                    if os.path.exists(excel_path):
+                    elif os.path.exists(excel_path):
                         try:
-                            df = pd.read_excel(excel_path, engine='openpyxl')
-                            if df.empty:
+                            columns, total_rows = self._cached_status(
+                                excel_path, ExcelHandler(self.config).read_header)
+                            if total_rows == 0:
                                 print(f"[警告] Excel模板已创建但无数据 ({excel_path})")
                             else:
-                                print(f"[已配置] Excel模板: {len(df.columns)}项 ({excel_path})")
+                                rows_text = f"{total_rows}行" if total_rows is not None else "行数未知"
+                                print(f"[已配置] Excel模板: {len(columns)}项，{rows_text} ({excel_path})")
                         except Exception:
                             print(f"[错误] Excel文件读取失败 ({excel_path})")
                     else:
@@ -87,6 +103,23 @@ class DocumentProcessor:
             else:
                 input("无效选择，按Enter继续...")
 
+    def _cached_status(self, path, loader):
+        """读取文件状态，文件路径、修改时间和大小均未变化时直接使用缓存"""
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.status_cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        
+        status = loader(path)
+        self.status_cache[path] = (key, status)
+        return status
+
+    def _read_items_count(self, items_path):
+        """读取items.txt中的待替换项数量"""
+        with open(items_path, 'r', encoding='utf-8') as f:
+            return len([i.strip() for i in f.read().split('；') if i.strip()])
+
     def set_word_template(self):
         path = input("\n请输入原始word文件路径: ")
         if validate_path(path, file_type='word'):
@@ -243,22 +276,22 @@ class DocumentProcessor:
         try:
             print("\n开始处理文档...")
             
-            # 检查并设置Excel文件路径
-            excel_path = os.path.join(self.config.output_dir, EXCEL_TEMPLATE_NAME)
+            # 检查并设置数据文件路径（默认为输出目录下的Excel模板）
+            excel_path = self.config.get_data_path()
             if not os.path.exists(excel_path):
-                raise FileNotFoundError(f"Excel文件不存在: {excel_path}")
+                raise FileNotFoundError(f"数据文件不存在: {excel_path}")
             self.config.excel_path = excel_path
             
             # 每次处理都重新初始化handlers
             self.excel_handler = ExcelHandler(self.config)
             
-            # 检查Excel数据
-            print(f"正在读取Excel文件: {excel_path}")
-            df = self.excel_handler.read_data()
-            if df.empty:
-                raise ValueError("Excel文件中没有数据，请先完善Excel内容")
+            # 检查数据
+            print(f"正在读取数据文件: {excel_path}")
+            if not self.excel_handler.has_data():
+                raise ValueError("数据文件中没有数据，请先完善数据内容")
             
-            # 初始化word处理器并处理文档
+            # 初始化word处理器并处理文档（python-docx等依赖只在生成文档时导入）
+            from src.word_handler import WordHandler
             self.word_handler = WordHandler(self.config)
             self.word_handler.process_documents()
             print("\n处理完成，按Enter返回菜单...")
@@ -288,9 +321,145 @@ class DocumentProcessor:
         self.config.save_config()
         input("按Enter返回菜单...")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='XLSM2WORD 文档处理系统')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='渲染文档使用的工作进程数（默认为CPU核心数，1表示单进程）')
+    parser.add_argument('--output-mode', choices=['files', 'zip'], default=None,
+                        help='输出方式：files为每行一个文件，zip为写入同一个ZIP归档（默认使用配置）')
+    parser.add_argument('--pdf', choices=['off', 'both', 'only'], default=None,
+                        help='同时生成PDF：off不生成，both生成docx和PDF，only只生成PDF（默认使用配置）')
+    parser.add_argument('--writer-threads', type=int, default=None,
+                        help='单进程模式下的后台写盘线程数，适用于较慢的共享存储（默认使用配置，0表示不使用）')
+    parser.add_argument('--data', default=None, metavar='PATH',
+                        help='数据文件路径，支持.xlsx/.csv/.parquet/.db（默认使用配置，未配置时为输出目录下的template.xlsx）')
+    parser.add_argument('--table', default=None,
+                        help='SQLite数据源的表名')
+    parser.add_argument('--profile', action='store_true',
+                        help='生成结束后输出各阶段耗时和计数的汇总表')
+    parser.add_argument('--trace', default=None, metavar='PATH',
+                        help='导出Chrome trace格式的逐行性能数据（隐含--profile）')
+    parser.add_argument('--shard', type=shard_spec, default=None, metavar='i/N',
+                        help='分片运行：只处理分配给第i片（共N片）的行，可在多台机器上分别运行')
+    parser.add_argument('--shard-key', default=None, metavar='COLUMN',
+                        help='按该列的哈希分配分片（默认按行号分配）')
+    parser.add_argument('--merge-shards', type=int, default=None, metavar='N',
+                        help='校验并合并N个分片的清单后退出')
+    # 无交互模式：指定任务文件或模板时直接生成文档，结果以JSON输出到标准输出
+    parser.add_argument('--job', default=None, metavar='FILE',
+                        help='JSON任务文件（键与配置项相同），无交互地生成文档')
+    parser.add_argument('--template', default=None, metavar='PATH',
+                        help='Word模板路径（无交互模式）')
+    parser.add_argument('--items', default=None,
+                        help='待替换项名称，中文分号分隔（无交互模式）')
+    parser.add_argument('--output-format', default=None,
+                        help='生成文件名格式（无交互模式）')
+    parser.add_argument('--output-dir', default=None, metavar='PATH',
+                        help='输出目录（无交互模式）')
+    parser.add_argument('--font-color', choices=['red', 'black'], default=None,
+                        help='替换项字体颜色（无交互模式）')
+    parser.add_argument('--progress', choices=['bar', 'json', 'none'], default='bar',
+                        help='无交互模式的进度输出：bar为进度条，json为每行一条JSON事件')
+    parser.add_argument('--serve', action='store_true',
+                        help='启动本地渲染服务（只监听127.0.0.1），按请求返回单个docx或PDF')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='渲染服务端口（默认8765）')
+    parser.add_argument('--import-report', action='store_true',
+                        help='输出各处理路径的模块导入耗时后退出，用于发现启动变慢')
+    return parser.parse_args()
+
+def shard_spec(value):
+    """argparse类型：解析 i/N 形式的分片参数"""
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def apply_args(config, args):
+    """将命令行中指定的参数应用到配置"""
+    if args.workers is not None:
+        config.workers = args.workers
+    if args.output_mode:
+        config.output_mode = args.output_mode
+    if args.pdf:
+        config.pdf_output = args.pdf
+    if args.writer_threads is not None:
+        config.writer_threads = args.writer_threads
+    if args.data:
+        config.data_source = args.data
+    if args.table:
+        config.data_table = args.table
+    if args.shard:
+        config.shard = args.shard
+    if args.shard_key:
+        config.shard_key = args.shard_key
+    if args.profile:
+        config.profile = True
+    if args.trace:
+        config.trace_path = args.trace
+
+def run_headless(args):
+    """
+    无交互模式：按任务文件和命令行参数生成文档
+    
+    标准输出只输出JSON（进度事件和最终结果），提示信息输出到标准错误。
+    
+    Returns:
+        退出码：0全部成功，1有行失败，2任务无法执行
+    """
+    from src.batch import load_job, make_config, render_batch
+    
+    stdout = sys.stdout
+    def emit(event):
+        stdout.write(json.dumps(event, ensure_ascii=False) + '\n')
+        stdout.flush()
+    
+    try:
+        job = load_job(args.job) if args.job else {}
+        overrides = {
+            'word_template': args.template,
+            'replace_items': args.items,
+            'output_format': args.output_format,
+            'output_dir': args.output_dir,
+            'font_color': args.font_color,
+        }
+        job.update({key: value for key, value in overrides.items() if value is not None})
+        config = make_config(job)
+        apply_args(config, args)
+        with contextlib.redirect_stdout(sys.stderr):
+            result = render_batch(config, emit if args.progress == 'json' else None,
+                                  show_progress=args.progress == 'bar')
+    except Exception as e:
+        emit({'event': 'error', 'error': str(e)})
+        return 2
+    emit({'event': 'done', **result.to_dict()})
+    return 0 if result.ok else 1
+
 def main():
+    args = parse_args()
+    if args.import_report:
+        from src.import_report import print_import_report
+        print_import_report()
+        return
+    if args.job or args.template:
+        sys.exit(run_headless(args))
+    
     processor = DocumentProcessor()
+    apply_args(processor.config, args)
+    if args.serve:
+        from src.server import serve
+        from src.parallel import resolve_workers
+        serve(processor.config, args.port, resolve_workers(processor.config.workers))
+        return
+    if args.merge_shards:
+        try:
+            rows = merge_shards(processor.config, args.merge_shards)
+            print(f"分片合并完成: {args.merge_shards} 个分片，共 {rows} 行")
+        except Exception as e:
+            print(f"分片合并失败: {str(e)}")
+            sys.exit(1)
+        return
     processor.show_menu()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
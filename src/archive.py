@@ -0,0 +1,46 @@
+import os
+import json
+import zipfile
+
+ARCHIVE_INDEX_NAME = 'index.json'
+
+
+class ArchiveWriter:
+    """将生成的文档逐个写入同一个ZIP归档，不产生临时文件"""
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self.temp_path = archive_path + '.tmp'
+        # docx本身已经压缩，成员直接存储即可
+        self.archive = zipfile.ZipFile(self.temp_path, 'w', zipfile.ZIP_STORED, allowZip64=True)
+        self.names = {}     # 成员名 -> 行索引
+        self.index = []     # 成员索引
+
+    def reserve(self, name, row_index):
+        """登记成员名，与已登记的成员重名时报错"""
+        if name in self.names:
+            raise ValueError(f"文件名重复: {name}（与第 {self.names[name] + 1} 行相同）")
+        self.names[name] = row_index
+
+    def add(self, name, data, row_index):
+        """写入一个成员"""
+        if self.names.get(name, row_index) != row_index:
+            raise ValueError(f"文件名重复: {name}（与第 {self.names[name] + 1} 行相同）")
+        self.names[name] = row_index
+        self.archive.writestr(name, data)
+        self.index.append({'row': row_index + 1, 'name': name, 'size': len(data)})
+
+    def close(self):
+        """写入成员索引并完成归档"""
+        self.archive.writestr(
+            ARCHIVE_INDEX_NAME,
+            json.dumps(self.index, ensure_ascii=False, indent=2)
+        )
+        self.archive.close()
+        os.replace(self.temp_path, self.archive_path)
+
+    def abort(self):
+        """放弃未完成的归档"""
+        self.archive.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
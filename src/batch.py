@@ -0,0 +1,112 @@
+import os
+import json
+import time
+from .config import Config
+from .sharding import parse_shard
+
+RUNTIME_KEYS = ('excel_handler',)
+
+
+class BatchResult:
+    """一次批量生成的结果"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.archive = None     # 输出到ZIP归档时为归档路径
+        self.rendered = 0
+        self.skipped = 0
+        self.failed = 0
+        self.outputs = []       # 本次生成的文件名（相对于输出目录，或归档中的成员名）
+        self.errors = []        # [(行号, 错误信息), ...]，行号从1开始
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return self.failed == 0
+
+    def to_dict(self):
+        return {
+            'ok': self.ok,
+            'rendered': self.rendered,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'seconds': round(self.seconds, 3),
+            'output_dir': self.output_dir,
+            'archive': self.archive,
+            'outputs': self.outputs,
+            'errors': [{'row': row, 'error': error} for row, error in self.errors],
+        }
+
+
+def load_job(path):
+    """读取JSON格式的任务文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_config(job):
+    """
+    由任务参数创建配置（不读取也不修改菜单程序保存的配置）
+    
+    Args:
+        job: 参数字典，键与 Config 的属性相同
+    """
+    config = Config(load_saved=False)
+    unknown = [key for key in job if key in RUNTIME_KEYS or not hasattr(config, key)]
+    if unknown:
+        raise ValueError(f"未知的任务参数: {', '.join(unknown)}")
+    for key, value in job.items():
+        setattr(config, key, value)
+
+    # 任务文件中的 replace_items 可以是列表，也可以是中文分号分隔的字符串
+    if isinstance(config.replace_items, str):
+        config.replace_items = [config.replace_items]
+    # 任务文件中的 shard 与命令行 --shard 相同，形如 "i/N"（i从1开始）
+    if config.shard:
+        config.shard = parse_shard(config.shard)
+    missing = [key for key in ('word_template', 'replace_items', 'output_format', 'output_dir')
+               if not getattr(config, key)]
+    if missing:
+        raise ValueError(f"任务缺少参数: {', '.join(missing)}")
+    if not os.path.exists(config.word_template):
+        raise FileNotFoundError(f"Word模板不存在: {config.word_template}")
+    os.makedirs(config.output_dir, exist_ok=True)
+    return config
+
+
+def render_batch(job, on_event=None, show_progress=False):
+    """
+    无交互地批量生成文档，可在同一进程中重复调用
+    
+    Args:
+        job: 参数字典或 Config 实例
+        on_event: 可选回调，每行处理完成时以字典形式接收进度事件
+        show_progress: 是否显示进度条
+    
+    Returns:
+        BatchResult；配置或数据错误时抛出异常
+    """
+    from .word_handler import WordHandler
+
+    config = job if isinstance(job, Config) else make_config(job)
+    config.show_progress = show_progress
+    result = BatchResult(config.output_dir)
+
+    def on_row(index, status, outputs, error):
+        if status == 'ok':
+            result.outputs.extend(outputs)
+        elif status == 'failed':
+            result.errors.append((index + 1, error))
+        if on_event:
+            on_event({'event': 'row', 'row': index + 1, 'status': status,
+                      'outputs': outputs, 'error': error})
+
+    handler = WordHandler(config, on_row=on_row)
+    start = time.perf_counter()
+    handler.process_documents()
+    result.seconds = time.perf_counter() - start
+    result.rendered = handler.stats['rendered']
+    result.skipped = handler.stats['skipped']
+    result.failed = handler.stats['failed']
+    result.archive = handler.archive_path
+    return result
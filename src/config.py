@@ -2,17 +2,42 @@ import os
 import json
 
 class Config:
-    def __init__(self):
+    def __init__(self, load_saved=True):
         self.word_template = None  # Word模板路径
         self.output_dir = None     # 输出目录
         self.replace_items = None    # 需要替换的项目列表
         self.output_format = None  # 输出文件名格式
+        self.extra_templates = []  # 附加模板: [{'word_template': 模板路径, 'output_format': 文件名格式}, ...]
+        self.filename_collision = 'suffix'  # 文件名重复时: suffix（自动添加序号）/error（立即停止）
         self.excel_path = None     # Excel文件路径
+        self.data_source = None  # 数据文件路径（.xlsx/.csv/.parquet/.db），None表示使用输出目录下的template.xlsx
+        self.data_table = None  # SQLite数据源的表名
+        self.data_query = None  # SQLite数据源的查询语句（优先于表名）
+        self.csv_encoding = 'utf-8-sig'  # CSV数据源的文件编码
         self.font_color = 'red'  # 默认红色
+        self.column_formats = {}  # 列格式规则，如 {'金额': 'rmb_upper', '日期': 'date:%Y年%m月%d日'}
+        self.render_engine = 'auto'  # 渲染引擎: auto/xml/docx
+        self.compression_level = 6  # 修改过的部件的压缩级别（0-9，0表示不压缩），未修改的部件直接复制原始压缩数据
+        self.chunk_size = 1000  # 流式读取Excel时每块的行数
+        self.output_mode = 'files'  # 输出方式: files（每行一个文件）/zip（写入同一个归档）
+        self.archive_name = 'documents.zip'  # ZIP归档文件名
+        self.pdf_output = 'off'  # PDF输出: off（不生成）/both（docx和PDF）/only（只生成PDF）
+        self.incremental = True  # 增量生成：跳过输入未变化的行
+        self.writer_threads = 0  # 单进程模式下的后台写盘线程数（0表示在渲染线程中直接写盘）
+        self.write_queue_depth = 32  # 等待写盘的文档数上限
+        self.render_cache_entries = 256  # 渲染缓存的最大条目数（0表示不使用缓存）
+        self.render_cache_mb = 64  # 渲染缓存的最大容量（MB）
+        self.workers = None  # 渲染工作进程数（None表示CPU核心数，由命令行指定）
+        self.profile = False  # 是否输出各阶段性能统计（由命令行指定）
+        self.trace_path = None  # Chrome trace导出路径（由命令行指定）
+        self.show_progress = True  # 是否显示进度条（由命令行指定）
+        self.shard = None  # 分片运行: (分片序号, 分片总数)，None表示处理全部行（由命令行指定）
+        self.shard_key = None  # 按该列的哈希分配分片，None表示按行号分配（由命令行指定）
         self.excel_handler = None  # Excel处理器实例
         
-        # 加载保存的配置
-        self.load_config()
+        # 加载保存的配置（无交互任务使用独立的配置，不读取菜单程序保存的配置）
+        if load_saved:
+            self.load_config()
 
     def is_valid(self):
         """检查配置是否完整"""
@@ -22,6 +47,19 @@ class Config:
             self.output_format   # 必须有输出格式
         ])
 
+    def get_templates(self):
+        """返回每行数据需要生成的所有模板: [(模板路径, 文件名格式), ...]，主模板在前"""
+        templates = [(self.word_template, self.output_format)]
+        for template in self.extra_templates or []:
+            templates.append((template['word_template'], template['output_format']))
+        return templates
+
+    def get_data_path(self):
+        """返回本次处理使用的数据文件路径"""
+        if self.data_source:
+            return self.data_source
+        return os.path.join(self.output_dir, 'template.xlsx')
+
     def save_config(self):
         """保存配置到文件"""
         config_data = {
@@ -29,7 +67,25 @@ class Config:
             'output_dir': self.output_dir,
             'replace_items': self.replace_items,
             'output_format': self.output_format,
-            'excel_path': self.excel_path
+            'extra_templates': self.extra_templates,
+            'excel_path': self.excel_path,
+            'data_source': self.data_source,
+            'data_table': self.data_table,
+            'data_query': self.data_query,
+            'csv_encoding': self.csv_encoding,
+            'render_engine': self.render_engine,
+            'compression_level': self.compression_level,
+            'chunk_size': self.chunk_size,
+            'incremental': self.incremental,
+            'output_mode': self.output_mode,
+            'archive_name': self.archive_name,
+            'pdf_output': self.pdf_output,
+            'writer_threads': self.writer_threads,
+            'write_queue_depth': self.write_queue_depth,
+            'filename_collision': self.filename_collision,
+            'column_formats': self.column_formats,
+            'render_cache_entries': self.render_cache_entries,
+            'render_cache_mb': self.render_cache_mb
         }
         
         config_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config')
@@ -59,6 +115,24 @@ class Config:
                 self.output_dir = config_data.get('output_dir')
                 self.replace_items = config_data.get('replace_items', [])
                 self.output_format = config_data.get('output_format')
+                self.extra_templates = config_data.get('extra_templates', [])
                 self.excel_path = config_data.get('excel_path')
+                self.data_source = config_data.get('data_source')
+                self.data_table = config_data.get('data_table')
+                self.data_query = config_data.get('data_query')
+                self.csv_encoding = config_data.get('csv_encoding', 'utf-8-sig')
+                self.render_engine = config_data.get('render_engine', 'auto')
+                self.compression_level = config_data.get('compression_level', 6)
+                self.chunk_size = config_data.get('chunk_size', 1000)
+                self.incremental = config_data.get('incremental', True)
+                self.output_mode = config_data.get('output_mode', 'files')
+                self.archive_name = config_data.get('archive_name', 'documents.zip')
+                self.pdf_output = config_data.get('pdf_output', 'off')
+                self.writer_threads = config_data.get('writer_threads', 0)
+                self.write_queue_depth = config_data.get('write_queue_depth', 32)
+                self.filename_collision = config_data.get('filename_collision', 'suffix')
+                self.column_formats = config_data.get('column_formats', {})
+                self.render_cache_entries = config_data.get('render_cache_entries', 256)
+                self.render_cache_mb = config_data.get('render_cache_mb', 64)
             except Exception as e:
                 print(f"加载配置失败: {e}") 
\ No newline at end of file
@@ -0,0 +1,155 @@
+import csv
+import os
+import sqlite3
+
+
+class CsvSource:
+    """CSV数据源：使用标准库csv模块逐行流式读取，所有值按文本处理"""
+
+    def __init__(self, path, config):
+        self.path = path
+        self.encoding = getattr(config, 'csv_encoding', None) or 'utf-8-sig'
+
+    def read_header(self):
+        with open(self.path, newline='', encoding=self.encoding) as f:
+            return next(csv.reader(f), None), None
+
+    def stream(self, chunk_size):
+        f = open(self.path, newline='', encoding=self.encoding)
+        try:
+            reader = csv.reader(f)
+            header = next(reader, None)
+        except Exception:
+            f.close()
+            raise
+        return header, None, self._iter_batches(f, reader, len(header or ()), chunk_size)
+
+    def _iter_batches(self, f, reader, width, chunk_size):
+        try:
+            indices, rows = [], []
+            for index, values in enumerate(reader):
+                # 跳过完全空白的行
+                if not any(value.strip() for value in values):
+                    continue
+                indices.append(index)
+                rows.append(values[:width] + [None] * (width - len(values)))
+                if len(rows) >= chunk_size:
+                    yield indices, list(zip(*rows))
+                    indices, rows = [], []
+            if rows:
+                yield indices, list(zip(*rows))
+        finally:
+            f.close()
+
+
+class ParquetSource:
+    """Parquet数据源：按批读取列式数据（需要安装pyarrow）"""
+
+    def __init__(self, path, config):
+        self.path = path
+
+    def _open(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("读取Parquet文件需要安装pyarrow: pip install pyarrow")
+        return pq.ParquetFile(self.path)
+
+    def read_header(self):
+        parquet = self._open()
+        return parquet.schema_arrow.names, parquet.metadata.num_rows
+
+    def stream(self, chunk_size):
+        parquet = self._open()
+        return (parquet.schema_arrow.names, parquet.metadata.num_rows,
+                self._iter_batches(parquet, chunk_size))
+
+    def _iter_batches(self, parquet, chunk_size):
+        start = 0
+        for batch in parquet.iter_batches(batch_size=chunk_size):
+            # 直接取整列数据，不逐行转换
+            data = [column.to_pylist() for column in batch.columns]
+            yield range(start, start + batch.num_rows), data
+            start += batch.num_rows
+
+
+class SqliteSource:
+    """SQLite数据源：按配置的表名或查询语句分批读取"""
+
+    def __init__(self, path, config):
+        self.path = path
+        self.table = getattr(config, 'data_table', None)
+        self.query = getattr(config, 'data_query', None)
+
+    def _connect(self):
+        return sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+
+    def _resolve_query(self, connection):
+        """确定读取数据的查询语句：优先使用配置的查询，其次是表名，数据库只有一个表时自动选择"""
+        if self.query:
+            return self.query
+        table = self.table
+        if not table:
+            tables = [row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+            if len(tables) != 1:
+                raise ValueError("数据库中有多个表或没有表，请在配置中指定data_table或data_query")
+            table = tables[0]
+        return 'SELECT * FROM "{}"'.format(table.replace('"', '""'))
+
+    def read_header(self):
+        connection = self._connect()
+        try:
+            query = self._resolve_query(connection)
+            cursor = connection.execute(f'SELECT * FROM ({query}) LIMIT 0')
+            return [column[0] for column in cursor.description], self._count(connection, query)
+        finally:
+            connection.close()
+
+    def _count(self, connection, query):
+        return connection.execute(f'SELECT COUNT(*) FROM ({query})').fetchone()[0]
+
+    def stream(self, chunk_size):
+        connection = self._connect()
+        try:
+            query = self._resolve_query(connection)
+            total_rows = self._count(connection, query)
+            cursor = connection.execute(query)
+            columns = [column[0] for column in cursor.description]
+        except Exception:
+            connection.close()
+            raise
+        return columns, total_rows, self._iter_batches(connection, cursor, chunk_size)
+
+    def _iter_batches(self, connection, cursor, chunk_size):
+        try:
+            start = 0
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield range(start, start + len(rows)), list(zip(*rows))
+                start += len(rows)
+        finally:
+            connection.close()
+
+
+# 文件扩展名 -> 数据源类型，其余格式按Excel读取
+SOURCE_TYPES = {
+    '.csv': CsvSource,
+    '.parquet': ParquetSource,
+    '.db': SqliteSource,
+    '.sqlite': SqliteSource,
+    '.sqlite3': SqliteSource,
+}
+
+
+def open_source(path, config):
+    """
+    根据文件扩展名选择数据源
+    
+    Returns:
+        数据源实例；Excel文件返回None
+    """
+    source_type = SOURCE_TYPES.get(os.path.splitext(path)[1].lower())
+    return source_type(path, config) if source_type else None
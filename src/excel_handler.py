@@ -1,42 +1,161 @@
-import pandas as pd
 import os
+from .formatting import ValueFormatter
+from .data_sources import open_source
+from .utils import split_replace_items
 
 class ExcelHandler:
     def __init__(self, config):
         self.config = config
 
+    def _formatter(self):
+        """根据配置中的列格式规则创建值格式化器"""
+        return ValueFormatter(getattr(self.config, 'column_formats', None))
+
     def create_template(self, excel_path):
         """创建Excel模板文件"""
         try:
             # 将分号分隔的字符串转换为列表
-            items = []
-            for item in self.config.replace_items:
-                # 如果项目中包含分号，则分割成多个项目
-                if '；' in item:
-                    items.extend([i.strip() for i in item.split('；') if i.strip()])
-                else:
-                    items.append(item.strip())
-            
-            # 创建DataFrame，使用处理后的项目列表作为列名
-            df = pd.DataFrame(columns=items)
+            items = split_replace_items(self.config.replace_items)
             
+            # 直接用openpyxl写入，不需要导入pandas
+            from openpyxl import Workbook
+            workbook = Workbook()
+            sheet = workbook.active
+            # 使用处理后的项目列表作为列名
+            sheet.append(items)
             # 添加一个空行作为数据输入示例，用'N/A'替代空值
-            df.loc[0] = ['N/A'] * len(items)
+            sheet.append(['N/A'] * len(items))
             
             # 保存到Excel文件
-            df.to_excel(excel_path, index=False, engine='openpyxl')
+            workbook.save(excel_path)
             return True
         except Exception as e:
             print(f"创建Excel模板失败: {str(e)}")
             return False
 
     def read_data(self):
-        """读取Excel数据"""
+        """读取Excel数据（CSV、Parquet和SQLite数据源同样返回DataFrame）"""
+        # pandas只在需要DataFrame时导入，生成文档使用不依赖pandas的 stream_data
+        import pandas as pd
         try:
+            if open_source(self.config.excel_path, self.config) is not None:
+                columns, _, chunks = self.stream_data()
+                return pd.DataFrame([row for chunk in chunks for _, row in chunk], columns=columns, dtype=object)
             df = pd.read_excel(self.config.excel_path, engine='openpyxl')
-            # 将所有的nan值替换为'N/A'
-            df = df.fillna('N/A')
-            return df
+            # 按列统一格式化为字符串，空值替换为'N/A'
+            formatter = self._formatter()
+            return pd.DataFrame({
+                column: formatter.format_column(str(column), df[column].tolist())
+                for column in df.columns
+            }, columns=df.columns, dtype=object)
         except Exception as e:
             print(f"读取Excel数据失败: {str(e)}")
-            return pd.DataFrame() 
\ No newline at end of file
+            return pd.DataFrame()
+
+    def stream_data(self, chunk_size=None):
+        """
+        流式读取Excel数据，内存占用只与块大小有关
+        
+        数据文件为CSV、Parquet或SQLite数据库时使用对应的数据源分批读取。
+        
+        Args:
+            chunk_size: 每块的行数，默认使用配置中的chunk_size
+        
+        Returns:
+            (列名列表, 预计数据行数, 行块生成器)，生成器每次产生 [(行索引, 行字典), ...]，
+            字典中的值已按列格式化为字符串
+        """
+        chunk_size = chunk_size or getattr(self.config, 'chunk_size', 1000)
+        source = open_source(self.config.excel_path, self.config)
+        if source is not None:
+            header, total_rows, batches = source.stream(chunk_size)
+            columns = self._parse_header(header)
+            return columns, total_rows, self._format_batches(columns, batches)
+        
+        from openpyxl import load_workbook
+        workbook = load_workbook(self.config.excel_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = sheet.iter_rows(values_only=True)
+            columns = self._parse_header(next(rows, None))
+            total_rows = self._count_rows(sheet)
+        except Exception:
+            workbook.close()
+            raise
+        
+        return columns, total_rows, self._iter_chunks(workbook, rows, columns, chunk_size)
+
+    def read_header(self, excel_path=None):
+        """
+        只读取Excel表头，不加载数据
+        
+        Returns:
+            (列名列表, 数据行数)，行数来自工作表尺寸信息，无法确定时为None
+        """
+        excel_path = excel_path or self.config.excel_path
+        source = open_source(excel_path, self.config)
+        if source is not None:
+            header, total_rows = source.read_header()
+            return self._parse_header(header), total_rows
+        
+        from openpyxl import load_workbook
+        workbook = load_workbook(excel_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+            return self._parse_header(header), self._count_rows(sheet)
+        finally:
+            workbook.close()
+
+    def _parse_header(self, header):
+        """将表头单元格转换为列名"""
+        return [
+            f'Unnamed: {i}' if name is None else str(name).strip()
+            for i, name in enumerate(header or ())
+        ]
+
+    def _count_rows(self, sheet):
+        """根据工作表尺寸信息计算数据行数（不读取数据）"""
+        if not sheet.max_row:
+            return None
+        return max(sheet.max_row - 1, 0)
+
+    def _iter_chunks(self, workbook, rows, columns, chunk_size):
+        """按块生成规范化后的行字典"""
+        formatter = self._formatter()
+        try:
+            chunk = []
+            for index, values in enumerate(rows):
+                # 跳过完全空白的行
+                if all(value is None for value in values):
+                    continue
+                chunk.append((index, dict(zip(columns, values))))
+                if len(chunk) >= chunk_size:
+                    # 整块按列格式化，缺失的单元格视为空值
+                    yield formatter.format_rows(columns, chunk)
+                    chunk = []
+            if chunk:
+                yield formatter.format_rows(columns, chunk)
+        finally:
+            workbook.close()
+
+    def _format_batches(self, columns, batches):
+        """将数据源按列产生的数据块格式化为行字典块"""
+        formatter = self._formatter()
+        try:
+            for indices, data in batches:
+                yield formatter.format_columns(columns, indices, data)
+        finally:
+            batches.close()
+
+    def has_data(self):
+        """检查Excel是否至少包含一行数据（只读取第一块）"""
+        try:
+            _, _, chunks = self.stream_data(chunk_size=1)
+            try:
+                return next(chunks, None) is not None
+            finally:
+                chunks.close()
+        except Exception as e:
+            print(f"读取Excel数据失败: {str(e)}")
+            return False
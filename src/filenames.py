@@ -0,0 +1,106 @@
+import re
+from .matcher import PlaceholderMatcher
+
+# 文件名中不允许出现的字符（兼顾Windows）及控制字符
+ILLEGAL_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+# Windows保留的设备名
+RESERVED_NAMES = {'CON', 'PRN', 'AUX', 'NUL'} | {f'COM{i}' for i in range(1, 10)} | {f'LPT{i}' for i in range(1, 10)}
+MAX_FILENAME_BYTES = 255
+
+
+class FilenameCollisionError(ValueError):
+    """输出文件名重复且配置为不允许自动改名"""
+
+
+class FilenamePlanner:
+    """
+    输出文件名规划：按数据块逐列批量生成文件名，在渲染前完成非法字符清理、长度校验和重名处理
+    
+    文件名格式只解析一次，拆分为固定文本和替换项；重名检测不区分大小写（兼容Windows和macOS）。
+    """
+
+    def __init__(self, output_format, replace_items, collision='suffix', extension='.docx', used=None):
+        if not output_format:
+            raise ValueError("输出文件名格式未设置")
+        self.collision = collision
+        self.extension = extension
+        self.segments = self._parse_format(output_format, replace_items)
+        # 规范化文件名 -> 行索引；多个模板共用同一字典以检测彼此之间的重名
+        self.used = {} if used is None else used
+
+    def _parse_format(self, output_format, replace_items):
+        """将文件名格式拆分为 (是否替换项, 文本) 片段（单次扫描，最长匹配优先）"""
+        segments = []
+        cursor = 0
+        for match in PlaceholderMatcher(replace_items).finditer(output_format):
+            if match.start() > cursor:
+                segments.append((False, output_format[cursor:match.start()]))
+            segments.append((True, match.group()))
+            cursor = match.end()
+        if cursor < len(output_format):
+            segments.append((False, output_format[cursor:]))
+        return segments
+
+    def plan(self, rows):
+        """
+        为一块数据生成输出文件名
+        
+        Args:
+            rows: [(行索引, 行字典), ...]
+        
+        Returns:
+            与rows对应的文件名列表；无法生成时对应位置为异常对象
+        """
+        # 逐列取值后按行拼接，固定文本只参与一次拼接
+        columns = [
+            [text] * len(rows) if not is_item else [str(row[text]) for _, row in rows]
+            for is_item, text in self.segments
+        ]
+        names = [''.join(parts) for parts in zip(*columns)] if columns else [''] * len(rows)
+        return [self._finalize(index, name) for (index, _), name in zip(rows, names)]
+
+    def _finalize(self, index, name):
+        """清理、校验并登记单个文件名"""
+        if name.lower().endswith(self.extension):
+            name = name[:-len(self.extension)]
+        name = self._sanitize(name)
+        try:
+            return self._register(index, name)
+        except FilenameCollisionError:
+            raise
+        except Exception as e:
+            return e
+
+    def _sanitize(self, base):
+        """替换非法字符，处理保留名和首尾的空格、句点"""
+        base = ILLEGAL_CHARS.sub('_', base).strip().rstrip('.')
+        if not base:
+            base = '_'
+        if base.split('.')[0].upper() in RESERVED_NAMES:
+            base = '_' + base
+        return base
+
+    def _truncate(self, base, suffix=''):
+        """按UTF-8字节数截断，保证文件名（含后缀和扩展名）不超过长度限制"""
+        limit = MAX_FILENAME_BYTES - len((suffix + self.extension).encode('utf-8'))
+        encoded = base.encode('utf-8')
+        if len(encoded) <= limit:
+            return base
+        return encoded[:limit].decode('utf-8', errors='ignore').rstrip()
+
+    def _register(self, index, base):
+        """检测重名：按配置自动添加序号或直接报错"""
+        filename = self._truncate(base) + self.extension
+        key = filename.casefold()
+        if key in self.used:
+            if self.collision == 'error':
+                raise FilenameCollisionError(
+                    f"第 {index + 1} 行的文件名 {filename} 与第 {self.used[key] + 1} 行重复")
+            number = 2
+            while key in self.used:
+                suffix = f' ({number})'
+                filename = self._truncate(base, suffix) + suffix + self.extension
+                key = filename.casefold()
+                number += 1
+        self.used[key] = index
+        return filename
@@ -0,0 +1,188 @@
+import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+EMPTY_VALUE = 'N/A'
+UPPER_DIGITS = '零壹贰叁肆伍陆柒捌玖'
+UPPER_UNITS = ['', '拾', '佰', '仟']
+UPPER_SECTIONS = ['', '万', '亿', '万亿']
+
+
+def to_rmb_upper(amount):
+    """
+    将金额转换为中文大写（如 1234.5 -> 壹仟贰佰叁拾肆元伍角整）
+    
+    Args:
+        amount: 数字或数字字符串
+    
+    Returns:
+        中文大写金额（整数部分超出万亿级时抛出ValueError）
+    """
+    cents = int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    prefix = '负' if cents < 0 else ''
+    integer, fraction = divmod(abs(cents), 100)
+    if integer >= 10 ** (4 * len(UPPER_SECTIONS)):
+        raise ValueError(f"金额超出大写转换范围: {amount}")
+    jiao, fen = divmod(fraction, 10)
+    
+    result = ''
+    if integer:
+        digits = str(integer)
+        length = len(digits)
+        zero_pending = False
+        for i, ch in enumerate(digits):
+            position = length - 1 - i
+            if ch == '0':
+                zero_pending = True
+            else:
+                if zero_pending:
+                    result += '零'
+                    zero_pending = False
+                result += UPPER_DIGITS[int(ch)] + UPPER_UNITS[position % 4]
+            # 每四位一节，整节为零时不写节单位
+            if position % 4 == 0 and position > 0 and int(digits[max(0, i - 3):i + 1]):
+                result += UPPER_SECTIONS[position // 4]
+        result += '元'
+    elif not fraction:
+        return '零元整'
+    
+    if jiao:
+        result += UPPER_DIGITS[jiao] + '角'
+    elif integer and fen:
+        result += '零'
+    result += UPPER_DIGITS[fen] + '分' if fen else '整'
+    return prefix + result
+
+
+class ValueFormatter:
+    """
+    单元格值规范化：按列批量把原始值转换为可直接写入文档的字符串
+    
+    格式规则（column_formats中按列名配置）:
+        text              原样输出
+        number[:小数位]    数字，未指定小数位时整数不带".0"
+        thousands[:小数位] 带千分位分隔符的数字
+        date[:格式]        日期，默认 %Y-%m-%d
+        rmb_upper         中文大写金额
+    未配置规则的列：日期时间为零点时只输出日期，整数值的浮点数去掉".0"。空值统一为'N/A'。
+    """
+
+    def __init__(self, column_formats=None):
+        self.rules = {
+            column: self._parse_rule(rule)
+            for column, rule in (column_formats or {}).items()
+        }
+
+    def _parse_rule(self, rule):
+        """解析格式规则字符串，返回 (规则名, 参数)"""
+        name, _, argument = str(rule).partition(':')
+        name = name.strip()
+        if name not in ('text', 'number', 'thousands', 'date', 'rmb_upper'):
+            raise ValueError(f"未知的格式规则: {rule}")
+        return name, argument or None
+
+    def format_column(self, column, values):
+        """
+        规范化一整列的值
+        
+        Args:
+            column: 列名
+            values: 该列的原始值列表
+        
+        Returns:
+            字符串列表
+        """
+        name, argument = self.rules.get(column, (None, None))
+        convert = getattr(self, f'_format_{name}') if name else self._format_default
+        result = []
+        for value in values:
+            if self._is_empty(value):
+                result.append(EMPTY_VALUE)
+                continue
+            try:
+                result.append(convert(value, argument))
+            except (ValueError, TypeError, InvalidOperation):
+                # 无法按规则转换的值保留原文
+                result.append(self._format_default(value, None))
+        return result
+
+    def format_rows(self, columns, rows):
+        """
+        按列规范化一块数据
+        
+        Args:
+            columns: 列名列表
+            rows: [(行索引, 行字典), ...]
+        
+        Returns:
+            [(行索引, 行字典), ...]，字典中的值均为字符串
+        """
+        data = [[row.get(column) for _, row in rows] for column in columns]
+        return self.format_columns(columns, [index for index, _ in rows], data)
+
+    def format_columns(self, columns, indices, data):
+        """
+        规范化按列存放的一块数据
+        
+        Args:
+            columns: 列名列表
+            indices: 各行的行索引
+            data: 与columns对应的各列值序列
+        
+        Returns:
+            [(行索引, 行字典), ...]，字典中的值均为字符串
+        """
+        if not columns:
+            return [(index, {}) for index in indices]
+        formatted = [self.format_column(column, values) for column, values in zip(columns, data)]
+        return [(index, dict(zip(columns, values))) for index, values in zip(indices, zip(*formatted))]
+
+    def _is_empty(self, value):
+        # NaN和NaT与自身不相等
+        return value is None or value != value or (isinstance(value, str) and not value.strip())
+
+    def _format_default(self, value, argument):
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        if isinstance(value, datetime.datetime):
+            if value.time() == datetime.time(0):
+                return value.strftime('%Y-%m-%d')
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return str(value)
+
+    def _format_text(self, value, argument):
+        return str(value)
+
+    def _to_decimal(self, value):
+        if isinstance(value, bool):
+            raise TypeError(value)
+        return Decimal(str(value).replace(',', '').strip())
+
+    def _round(self, number, places):
+        """四舍五入到指定小数位（与金额大写一致，不使用银行家舍入）"""
+        return number.quantize(Decimal(1).scaleb(-int(places)), rounding=ROUND_HALF_UP)
+
+    def _format_number(self, value, argument):
+        number = self._to_decimal(value)
+        if argument is not None:
+            return f'{self._round(number, argument):.{int(argument)}f}'
+        if number == number.to_integral_value():
+            return str(int(number))
+        return self._format_default(value, None)
+
+    def _format_thousands(self, value, argument):
+        number = self._to_decimal(value)
+        if argument is not None:
+            return f'{self._round(number, argument):,.{int(argument)}f}'
+        if number == number.to_integral_value():
+            return f'{int(number):,}'
+        return f'{number:,}'
+
+    def _format_date(self, value, argument):
+        if isinstance(value, str):
+            value = datetime.datetime.fromisoformat(value.strip())
+        if not isinstance(value, (datetime.date, datetime.datetime)):
+            raise TypeError(value)
+        return value.strftime(argument or '%Y-%m-%d')
+
+    def _format_rmb_upper(self, value, argument):
+        return to_rmb_upper(self._to_decimal(value))
@@ -0,0 +1,75 @@
+import os
+import re
+import sys
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 菜单启动、生成docx和生成PDF时各自需要导入的模块
+REPORT_MODULES = ('main', 'src.word_handler', 'src.pdf_converter')
+# 导入耗时较大的第三方依赖，应只在需要它们的处理路径中导入
+HEAVY_MODULES = ('pandas', 'numpy', 'docx', 'lxml', 'openpyxl', 'reportlab', 'tqdm')
+
+LINE_PATTERN = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)')
+
+
+def measure_imports(module):
+    """
+    在新的解释器中用 -X importtime 导入模块
+    
+    Returns:
+        (累计耗时ms, [(直接导入的模块, 累计耗时ms), ...], 导入的重量级依赖列表)
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=ROOT_DIR
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1:] or ['未知错误']
+        raise RuntimeError(f"导入 {module} 失败: {error[0]}")
+
+    children, names = [], []
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        if depth == 1:
+            # 顶层条目：目标模块在其所有子模块之后输出
+            if name == module:
+                heavy = [m for m in HEAVY_MODULES if m in names]
+                return cumulative, sorted(children, key=lambda c: -c[1]), heavy
+            children, names = [], []
+        else:
+            names.append(name.split('.')[0])
+            if depth == 3:
+                children.append((name, cumulative))
+    raise RuntimeError(f"没有找到 {module} 的导入记录")
+
+
+def import_report(modules=REPORT_MODULES):
+    """
+    各模块的导入耗时
+    
+    Returns:
+        {模块: {'ms': 累计耗时, 'heavy': 重量级依赖, 'children': {直接导入的模块: 耗时}}}
+    """
+    report = {}
+    for module in modules:
+        total, children, heavy = measure_imports(module)
+        report[module] = {
+            'ms': round(total, 1),
+            'heavy': heavy,
+            'children': {name: round(ms, 1) for name, ms in children},
+        }
+    return report
+
+
+def print_import_report(modules=REPORT_MODULES, top=8):
+    """输出导入耗时报告，每个模块列出耗时最多的直接导入项"""
+    print("导入耗时报告（-X importtime，新解释器中测量）:")
+    for module, result in import_report(modules).items():
+        heavy = '、'.join(result['heavy']) or '无'
+        print(f"\n{module}: {result['ms']:.1f} ms（重量级依赖: {heavy}）")
+        for name, ms in list(result['children'].items())[:top]:
+            print(f"    {name:<32} {ms:>8.1f} ms")
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class Instrumentation:
+    """可选的性能统计：记录每行各阶段的耗时和计数，批次结束后输出汇总表或导出Chrome trace"""
+
+    def __init__(self, keep_events=False):
+        self.enabled = True
+        self.keep_events = keep_events
+        self.stages = {}    # 阶段名 -> [调用次数, 总耗时, 最大耗时]
+        self.counters = {}  # 计数名 -> 累计值
+        self.events = []    # (阶段名, 行索引, 开始时间, 耗时, 进程号)
+        self.origin = time.time() - time.perf_counter()   # perf_counter转换为绝对时间的偏移
+        self.pid = os.getpid()
+
+    @contextmanager
+    def stage(self, name, row=None):
+        """记录一个阶段的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, row, start, time.perf_counter() - start)
+
+    def add_timing(self, name, row, start, duration):
+        stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+        stage[0] += 1
+        stage[1] += duration
+        stage[2] = max(stage[2], duration)
+        if self.keep_events:
+            self.events.append((name, row, self.origin + start, duration, self.pid))
+
+    def count(self, name, value=1):
+        """累加计数"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def state(self):
+        """导出统计数据（用于从工作进程传回主进程）"""
+        return {'stages': self.stages, 'counters': self.counters, 'events': self.events}
+
+    def merge(self, state):
+        """合并工作进程的统计数据"""
+        for name, (calls, total, longest) in state['stages'].items():
+            stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+            stage[0] += calls
+            stage[1] += total
+            stage[2] = max(stage[2], longest)
+        for name, value in state['counters'].items():
+            self.count(name, value)
+        if self.keep_events:
+            self.events.extend(state['events'])
+
+    def summary_table(self, elapsed=None):
+        """生成各阶段耗时和计数的汇总表"""
+        total = sum(stage[1] for stage in self.stages.values()) or 1
+        lines = [
+            f"{'阶段':<14}{'次数':>10}{'总耗时(s)':>12}{'平均(ms)':>12}{'最大(ms)':>12}{'占比':>8}",
+            '-' * 68
+        ]
+        for name, (calls, seconds, longest) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append(
+                f"{name:<16}{calls:>10}{seconds:>12.3f}{seconds / calls * 1000:>12.3f}"
+                f"{longest * 1000:>12.3f}{seconds / total:>8.1%}"
+            )
+        lines.append('-' * 68)
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<24}{value:>12}")
+        if elapsed is not None:
+            lines.append(f"{'elapsed_seconds':<24}{elapsed:>12.3f}")
+        return '\n'.join(lines)
+
+    def export_trace(self, path):
+        """导出Chrome trace格式（可在 chrome://tracing 或 Perfetto 中打开），汇总数据放在otherData中"""
+        events = [
+            {
+                'name': name, 'cat': 'row', 'ph': 'X',
+                'ts': round(start * 1e6), 'dur': round(duration * 1e6),
+                'pid': pid, 'tid': pid,
+                'args': {} if row is None else {'row': row + 1}
+            }
+            for name, row, start, duration, pid in self.events
+        ]
+        data = {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'stages': {
+                    name: {'calls': calls, 'seconds': seconds, 'max_seconds': longest}
+                    for name, (calls, seconds, longest) in self.stages.items()
+                },
+                'counters': self.counters
+            }
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+class NullInstrumentation:
+    """未启用统计时使用的空实现，开销可忽略"""
+
+    enabled = False
+    _context = nullcontext()
+
+    def stage(self, name, row=None):
+        return self._context
+
+    def add_timing(self, name, row, start, duration):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def merge(self, state):
+        pass
@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+
+MANIFEST_NAME = 'render_manifest.jsonl'
+
+
+def file_hash(path):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def values_hash(values):
+    """计算一行替换值的哈希"""
+    data = json.dumps(values, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class RenderManifest:
+    """
+    渲染清单：记录每行的输入哈希和输出文件，用于增量生成
+    
+    上次的记录按内容（输出文件名、替换值哈希、模板哈希、字体颜色）匹配，行号只作记录，
+    插入或删除数据行后其余行仍可跳过；
+    清单以JSON Lines格式追加写入，批次中断后已完成的行不会丢失；
+    批次正常结束时重写为只包含本次数据行的紧凑版本。
+    """
+
+    def __init__(self, output_dir, name=MANIFEST_NAME, resume=True):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, name)
+        # resume为False时不读取已有清单，所有行重新生成
+        self.previous = self._load() if resume else {}    # 内容键 -> 上次记录
+        self.current = {}               # 行索引 -> 本次记录
+        self.outputs = set()            # 本次涉及的输出文件名
+        self.log = None
+
+    @staticmethod
+    def content_key(entry):
+        """清单记录的内容键（不含行号）"""
+        return tuple(entry['outputs']), entry['hash'], entry['template'], entry['font_color']
+
+    def read_entries(self):
+        """按文件顺序读取已有清单记录（忽略中断时写了一半的行）"""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entry['row'], self.content_key(entry)   # 校验必需字段
+                    entries.append(entry)
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return entries
+
+    def _load(self):
+        """读取已有清单，按内容键索引"""
+        return {self.content_key(entry): entry for entry in self.read_entries()}
+
+    def make_entry(self, index, values, template_hash, font_color, output_filenames):
+        """生成一行的清单记录"""
+        return {
+            'row': index,
+            'hash': values_hash(values),
+            'template': template_hash,
+            'font_color': font_color,
+            'outputs': list(output_filenames)
+        }
+
+    def is_current(self, entry):
+        """输入未变化且输出文件仍存在时返回True（数据行移动时按新行号记录）"""
+        self.outputs.update(entry['outputs'])
+        if self.content_key(entry) not in self.previous:
+            return False
+        if not all(os.path.exists(os.path.join(self.output_dir, name)) for name in entry['outputs']):
+            return False
+        self.current[entry['row']] = entry
+        return True
+
+    def record(self, entry):
+        """记录成功生成的行（立即追加到清单文件）"""
+        if self.log is None:
+            self.log = open(self.path, 'a', encoding='utf-8')
+        self.current[entry['row']] = entry
+        self.log.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.log.flush()
+
+    def finish(self):
+        """
+        批次结束：删除已不存在的数据行对应的输出文件，并重写紧凑清单
+        
+        Returns:
+            删除的文件数
+        """
+        self.close()
+        removed = 0
+        stale = {
+            name for entry in self.previous.values() for name in entry.get('outputs', [])
+        } - self.outputs
+        for filename in stale:
+            path = os.path.join(self.output_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for index in sorted(self.current):
+                f.write(json.dumps(self.current[index], ensure_ascii=False) + '\n')
+        os.replace(temp_path, self.path)
+        return removed
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
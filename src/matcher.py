@@ -0,0 +1,53 @@
+import re
+
+
+class PlaceholderMatcher:
+    """多模式匹配器：所有替换项编译为一个前缀树正则，单次扫描完成全部替换（最长匹配优先）"""
+
+    def __init__(self, items):
+        self.items = [item for item in dict.fromkeys(items) if item]
+        self.pattern = re.compile(self._build_pattern(self.items)) if self.items else None
+
+    def _build_pattern(self, items):
+        """将替换项构造成前缀树，再转换为正则表达式"""
+        trie = {}
+        for item in items:
+            node = trie
+            for char in item:
+                node = node.setdefault(char, {})
+            node[''] = True     # 标记单词结尾
+        return self._trie_to_pattern(trie)
+
+    def _trie_to_pattern(self, node):
+        """递归生成正则：分支按字符分组，可选的更长分支优先尝试以保证最长匹配"""
+        terminal = '' in node
+        branches = [re.escape(char) + self._trie_to_pattern(child)
+                    for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        if terminal:
+            # 当前位置已能构成完整替换项，更长的分支为可选（贪婪匹配即最长优先）
+            return '(?:' + '|'.join(branches) + ')?'
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    def search(self, text):
+        """判断文本中是否包含任一替换项"""
+        return self.pattern is not None and self.pattern.search(text) is not None
+
+    def finditer(self, text):
+        """按出现顺序返回所有匹配（互不重叠）"""
+        if self.pattern is None:
+            return iter(())
+        return self.pattern.finditer(text)
+
+    def sub(self, text, values):
+        """
+        单次扫描替换文本中的所有替换项
+        
+        Args:
+            text: 原始文本
+            values: 替换项 -> 替换值 的字典
+        """
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(lambda m: values[m.group()], text)
@@ -0,0 +1,165 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .template import load_template
+from .pipeline import RowRenderer
+from .instrumentation import Instrumentation
+
+CHUNK_SIZE = 64     # 每个任务包含的行数
+ARCHIVE_CHUNK_SIZE = 4  # 文件字节需返回主进程时每个任务的行数（限制在途文档占用的内存）
+
+# 工作进程中的渲染流水线（每个进程只加载一次模板）
+_worker_renderer = None
+_worker_profile = None  # None表示不统计，否则为是否保留逐行事件
+
+
+def _init_worker(config, replace_items, engines, profile=None):
+    """工作进程初始化：编译所有模板"""
+    global _worker_renderer, _worker_profile
+    _worker_profile = profile
+    font_color = getattr(config, 'font_color', 'red')
+    compression_level = getattr(config, 'compression_level', 6)
+    templates = [
+        load_template(path, replace_items, font_color, engine, compression_level)
+        for (path, _), engine in zip(config.get_templates(), engines)
+    ]
+    _worker_renderer = RowRenderer(templates, config)
+
+
+def _render_chunk(chunk):
+    """
+    在工作进程中渲染一组行
+    
+    Returns:
+        (每行的 (错误信息, 输出) 列表, 统计数据)；成功时错误信息为None，
+        任务没有输出路径时输出为 [(文件名, 字节)]，交由主进程写入；未启用统计时统计数据为None
+    """
+    if _worker_profile is not None:
+        _worker_renderer.instrumentation = Instrumentation(keep_events=_worker_profile)
+    results = []
+    for job in chunk:
+        try:
+            results.append((None, _worker_renderer.render(job)))
+        except Exception as e:
+            results.append((str(e), None))
+    if _worker_profile is None:
+        return results, None
+    return results, _worker_renderer.instrumentation.state()
+
+
+def resolve_workers(workers):
+    """解析工作进程数，未设置时使用CPU核心数"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+class ParallelRenderer:
+    """多进程渲染：按块将数据行分配给工作进程，按行顺序汇总结果"""
+
+    def __init__(self, config, replace_items, engines, workers, chunk_size=CHUNK_SIZE, instrumentation=None):
+        self.instrumentation = instrumentation
+        profile = instrumentation.keep_events if instrumentation is not None and instrumentation.enabled else None
+        self.init_args = (config, replace_items, engines, profile)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    def _new_executor(self, workers=None):
+        """创建新的进程池（默认self.workers个进程）"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers or self.workers,
+            initializer=_init_worker,
+            initargs=self.init_args
+        )
+
+    def _chunks(self, jobs):
+        """将任务按chunk_size分块"""
+        chunk = []
+        for job in jobs:
+            chunk.append(job)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _submit(self, chunk):
+        """提交一个块；进程池已损坏时返回None"""
+        try:
+            return self.executor.submit(_render_chunk, chunk)
+        except BrokenProcessPool:
+            return None
+
+    def _run_isolated(self, chunk):
+        """
+        在单进程的进程池中单独渲染一个块，用于定位导致工作进程崩溃的数据
+        
+        块仍使进程池崩溃时二分重试，只有导致崩溃的行记为失败；每次崩溃后只重建一个工作进程，
+        避免启动全部工作进程并重新编译模板
+        
+        Returns:
+            按行顺序排列的 (子块, 子块结果) 列表
+        """
+        try:
+            return [(chunk, self.executor.submit(_render_chunk, chunk).result())]
+        except BrokenProcessPool:
+            self._new_executor(workers=1)
+            if len(chunk) == 1:
+                return [(chunk, ([("工作进程异常退出", None)], None))]
+        middle = len(chunk) // 2
+        return self._run_isolated(chunk[:middle]) + self._run_isolated(chunk[middle:])
+
+    def run(self, jobs, on_done):
+        """
+        渲染所有任务
+        
+        Args:
+            jobs: RenderJob 的可迭代对象
+            on_done: 每行完成后按行顺序调用 on_done(job, 错误信息, 输出)，成功时错误信息为None
+        """
+        window = deque()    # 按提交顺序保存 (块, future)
+        chunks = self._chunks(jobs)
+        self._new_executor()
+
+        def collect(chunk, chunk_result):
+            results, state = chunk_result
+            if state is not None:
+                self.instrumentation.merge(state)
+            for job, (error, outputs) in zip(chunk, results):
+                on_done(job, error, outputs)
+
+        try:
+            while True:
+                # 保持有限数量的在途任务，控制内存占用
+                while len(window) < self.workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    window.append((chunk, self._submit(chunk)))
+                if not window:
+                    break
+
+                chunk, future = window.popleft()
+                try:
+                    if future is None:
+                        raise BrokenProcessPool("进程池已损坏")
+                    collect(chunk, future.result())
+                except BrokenProcessPool:
+                    # 工作进程异常退出：逐块单独重试在途任务，只有导致崩溃的行记为失败
+                    pending = [chunk] + [item[0] for item in window]
+                    window.clear()
+                    self._new_executor(workers=1)
+                    for suspect in pending:
+                        for part, part_result in self._run_isolated(suspect):
+                            collect(part, part_result)
+                    # 恢复完整的进程池继续处理后续的块
+                    self._new_executor()
+                except Exception as e:
+                    collect(chunk, ([(str(e), None)] * len(chunk), None))
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
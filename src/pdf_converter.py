@@ -1,20 +1,38 @@
 import os
+import time
 import platform
-from docx import Document
-from reportlab.pdfgen import canvas
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.colors import red, black
+from reportlab.lib.colors import red
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+
+# 工作进程中的转换器（每个进程只注册一次字体、创建一次样式）
+_worker_converter = None
+
+
+def _init_worker(config):
+    """工作进程初始化：注册字体并创建样式"""
+    global _worker_converter
+    _worker_converter = PDFConverter(config)
+
+
+def _convert_in_worker(word_path):
+    """在工作进程中转换单个文件"""
+    return _worker_converter.convert_file(word_path)
+
 
 class PDFConverter:
     def __init__(self, config):
         self.config = config
         self.font_name = 'CustomFont'
         self.setup_fonts()
+        self.styles = self._build_styles()
 
     def setup_fonts(self):
         """设置字体"""
@@ -35,88 +53,198 @@ class PDFConverter:
                 pdfmetrics.registerFont(TTFont(self.font_name, font_path))
                 break
 
-    def convert_all(self):
-        """转换目录下所有Word文档为PDF"""
+    def convert_all(self, workers=None):
+        """
+        转换目录下所有Word文档为PDF
+        
+        Args:
+            workers: 工作进程数，默认使用配置中的workers（未设置时为CPU核心数）
+        
+        Returns:
+            每个文件的 (文件名, 耗时秒数, 错误信息) 列表，成功时错误信息为None
+        """
+        from .parallel import resolve_workers
+        
         try:
             input_dir = self.config.output_dir
-            for filename in os.listdir(input_dir):
-                if filename.endswith('.docx'):
-                    word_path = os.path.join(input_dir, filename)
-                    pdf_path = os.path.join(input_dir, filename.rsplit('.', 1)[0] + '.pdf')
-                    self._convert_to_pdf(word_path, pdf_path)
-                    print(f"已生成PDF文件: {pdf_path}")
+            word_paths = [
+                os.path.join(input_dir, filename)
+                for filename in sorted(os.listdir(input_dir))
+                if filename.endswith('.docx')
+            ]
         except Exception as e:
             print(f"PDF转换过程出错: {str(e)}")
+            return []
+        if not word_paths:
+            print("没有需要转换的Word文档")
+            return []
+        
+        workers = min(resolve_workers(workers or getattr(self.config, 'workers', None)), len(word_paths))
+        start = time.perf_counter()
+        if workers > 1:
+            # 每个工作进程初始化时注册字体，之后转换分配到的文件
+            results = []
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(self.config,)) as executor:
+                    chunksize = max(1, len(word_paths) // (workers * 4))
+                    for result in executor.map(_convert_in_worker, word_paths, chunksize=chunksize):
+                        results.append(result)
+            except BrokenProcessPool:
+                # 工作进程异常退出：尚未返回结果的文件记为失败
+                results.extend(
+                    (os.path.basename(word_path), 0.0, "工作进程异常退出")
+                    for word_path in word_paths[len(results):]
+                )
+        else:
+            results = [self.convert_file(word_path) for word_path in word_paths]
+        
+        self._print_summary(results, time.perf_counter() - start, workers)
+        return results
 
-    def _convert_to_pdf(self, word_path, pdf_path):
-        """转换单个Word文档为PDF"""
+    def convert_file(self, word_path):
+        """转换单个文件，返回 (文件名, 耗时秒数, 错误信息)"""
+        pdf_path = word_path.rsplit('.', 1)[0] + '.pdf'
+        start = time.perf_counter()
         try:
-            doc = Document(word_path)
-            pdf_doc = SimpleDocTemplate(
-                pdf_path,
-                pagesize=A4,
-                rightMargin=50,
-                leftMargin=50,
-                topMargin=50,
-                bottomMargin=50
+            self._convert_to_pdf(word_path, pdf_path)
+            error = None
+        except Exception as e:
+            error = str(e)
+        return os.path.basename(word_path), time.perf_counter() - start, error
+
+    def _print_summary(self, results, elapsed, workers):
+        """输出转换汇总信息"""
+        failed = [(name, error) for name, _, error in results if error is not None]
+        durations = sorted(seconds for _, seconds, _ in results)
+        print(f"\nPDF转换完成: 成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个，"
+              f"工作进程 {workers} 个，总耗时 {elapsed:.2f} 秒")
+        if durations:
+            slowest = max(results, key=lambda result: result[1])
+            print(f"单个文件耗时: 平均 {sum(durations) / len(durations):.3f} 秒，"
+                  f"中位数 {durations[len(durations) // 2]:.3f} 秒，"
+                  f"最慢 {slowest[1]:.3f} 秒 ({slowest[0]})")
+        for name, error in failed:
+            print(f"转换PDF失败: {name} - {error}")
+
+    def _build_styles(self):
+        """创建段落样式（每个转换器只创建一次）"""
+        return {
+            'normal': ParagraphStyle(
+                'normal',
+                fontName=self.font_name,
+                fontSize=12,
+                leading=14,
+                alignment=TA_LEFT
+            ),
+            'center': ParagraphStyle(
+                'center',
+                fontName=self.font_name,
+                fontSize=12,
+                leading=14,
+                alignment=TA_CENTER
+            ),
+            'red': ParagraphStyle(
+                'red',
+                fontName=self.font_name,
+                fontSize=12,
+                leading=14,
+                alignment=TA_LEFT,
+                textColor=red
             )
+        }
 
-            # 创建样式
-            styles = {
-                'normal': ParagraphStyle(
-                    'normal',
-                    fontName=self.font_name,
-                    fontSize=12,
-                    leading=14,
-                    alignment=TA_LEFT
-                ),
-                'center': ParagraphStyle(
-                    'center',
-                    fontName=self.font_name,
-                    fontSize=12,
-                    leading=14,
-                    alignment=TA_CENTER
-                ),
-                'red': ParagraphStyle(
-                    'red',
-                    fontName=self.font_name,
-                    fontSize=12,
-                    leading=14,
-                    alignment=TA_LEFT,
-                    textColor=red
-                )
-            }
-
-            # 处理文档内容
-            story = []
-            for paragraph in doc.paragraphs:
-                # 检查段落对齐方式
-                if paragraph.alignment == 1:  # 居中对齐
-                    style = styles['center']
+    def _convert_to_pdf(self, word_path, pdf_path):
+        """转换单个Word文档为PDF（失败时抛出异常）"""
+        from docx import Document
+        self.build_pdf(Document(word_path), pdf_path)
+
+    def build_pdf(self, doc, target):
+        """
+        将内存中的Word文档生成PDF
+        
+        Args:
+            doc: python-docx文档对象
+            target: PDF文件路径或可写的文件对象
+        """
+        # 处理文档内容
+        story = []
+        for paragraph in doc.paragraphs:
+            # 检查段落对齐方式
+            if paragraph.alignment == 1:  # 居中对齐
+                style = self.styles['center']
+            else:
+                style = self.styles['normal']
+
+            # 处理段落中的红色文本
+            text = ''
+            for run in paragraph.runs:
+                if hasattr(run.font.color, 'rgb') and run.font.color.rgb:
+                    # 红色文本
+                    text += f'<font color="red">{escape(run.text)}</font>'
                 else:
-                    style = styles['normal']
-
-                # 处理段落中的红色文本
-                text = ''
-                for run in paragraph.runs:
-                    if hasattr(run.font.color, 'rgb') and run.font.color.rgb:
-                        # 红色文本
-                        text += f'<font color="red">{run.text}</font>'
-                    else:
-                        text += run.text
-
-                if text.strip():
-                    p = Paragraph(text, style)
-                    story.append(p)
-                    story.append(Spacer(1, 12))  # 段落间距
-
-            # 处理表格（如果有）
-            for table in doc.tables:
-                # 这里可以添加表格处理逻辑
-                pass
-
-            # 生成PDF
-            pdf_doc.build(story)
+                    text += escape(run.text)
 
-        except Exception as e:
-            print(f"转换PDF失败: {word_path} - {str(e)}") 
\ No newline at end of file
+            self._add_paragraph(story, text, style)
+
+        # 处理表格（如果有）
+        for table in doc.tables:
+            # 这里可以添加表格处理逻辑
+            pass
+
+        self._build(story, target)
+
+    def compile_layout(self, compiled):
+        """
+        根据编译模板预先计算PDF段落布局（每个批次只计算一次）
+        
+        Returns:
+            [(段落样式, [(是否替换项, 文本), ...]), ...]，普通文本已转义
+        """
+        layout = []
+        for alignment, parts in compiled.paragraph_parts():
+            style = self.styles['center'] if alignment == 1 else self.styles['normal']
+            layout.append((style, [(is_slot, text if is_slot else escape(text)) for is_slot, text in parts]))
+        return layout
+
+    def render_pdf(self, layout, values, target):
+        """
+        直接由编译模板布局和一行替换值生成PDF，不经过docx文件
+        
+        Args:
+            layout: compile_layout 的结果
+            values: 替换项 -> 替换值 的字典
+            target: PDF文件路径或可写的文件对象
+        """
+        font_color = getattr(self.config, 'font_color', 'red')
+        story = []
+        for style, parts in layout:
+            text = ''
+            for is_slot, part in parts:
+                if not is_slot:
+                    text += part
+                elif font_color == 'red':
+                    # 替换值标记为红色
+                    text += f'<font color="red">{escape(values[part])}</font>'
+                else:
+                    text += escape(values[part])
+            self._add_paragraph(story, text, style)
+        self._build(story, target)
+
+    def _add_paragraph(self, story, text, style):
+        """添加非空段落及段落间距"""
+        if text.strip():
+            story.append(Paragraph(text, style))
+            story.append(Spacer(1, 12))  # 段落间距
+
+    def _build(self, story, target):
+        """生成PDF"""
+        pdf_doc = SimpleDocTemplate(
+            target,
+            pagesize=A4,
+            rightMargin=50,
+            leftMargin=50,
+            topMargin=50,
+            bottomMargin=50
+        )
+        pdf_doc.build(story)
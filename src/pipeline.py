@@ -0,0 +1,83 @@
+import io
+import os
+from .instrumentation import NullInstrumentation
+
+
+def pdf_filename(filename):
+    """由docx文件名得到对应的PDF文件名"""
+    return filename.rsplit('.', 1)[0] + '.pdf'
+
+
+class RowRenderer:
+    """单行渲染流水线：由编译模板在同一次处理中生成docx和/或PDF，多个模板共用同一行数据"""
+
+    def __init__(self, templates, config, instrumentation=None):
+        self.templates = templates
+        self.instrumentation = instrumentation or NullInstrumentation()
+        mode = getattr(config, 'pdf_output', 'off')
+        self.write_docx = mode != 'only'
+        self.pdf = None
+        self.layouts = [None] * len(templates)
+        if mode != 'off':
+            # PDF直接由编译模板和替换值生成，不需要重新打开docx文件
+            from .pdf_converter import PDFConverter
+            self.pdf = PDFConverter(config)
+            self.layouts = [
+                self.pdf.compile_layout(getattr(template, 'compiled', template))
+                for template in templates
+            ]
+
+    def output_names(self, filenames):
+        """一行数据对应的所有输出文件名"""
+        names = []
+        for filename in filenames:
+            if self.write_docx:
+                names.append(filename)
+            if self.pdf:
+                names.append(pdf_filename(filename))
+        return names
+
+    def render(self, job):
+        """
+        渲染一行数据
+        
+        Returns:
+            job.output_dir 为None时返回 [(文件名, 文件字节), ...]，否则直接写入文件并返回None
+        """
+        instrumentation = self.instrumentation
+        outputs = []
+        for template, layout, filename in zip(self.templates, self.layouts, job.filenames):
+            path = os.path.join(job.output_dir, filename) if job.output_dir is not None else None
+            if self.write_docx:
+                with instrumentation.stage('render', job.index):
+                    document = template.render(job.values)
+                with instrumentation.stage('save', job.index):
+                    outputs.append(self._write(
+                        filename, path,
+                        lambda target: template.write(document, target)
+                    ))
+                instrumentation.count('placeholders_hit', template.placeholder_hits)
+                instrumentation.count('runs_touched', template.runs_touched)
+            if self.pdf:
+                pdf_path = pdf_filename(path) if path else None
+                with instrumentation.stage('pdf', job.index):
+                    outputs.append(self._write(
+                        pdf_filename(filename), pdf_path,
+                        lambda target: self.pdf.render_pdf(layout, job.values, target)
+                    ))
+        if job.output_dir is not None:
+            return None
+        return outputs
+
+    def _write(self, name, path, writer):
+        """写入文件；没有路径时渲染到内存并返回 (文件名, 字节)"""
+        if path is not None:
+            writer(path)
+            if self.instrumentation.enabled:
+                self.instrumentation.count('bytes_written', os.path.getsize(path))
+            return None
+        buffer = io.BytesIO()
+        writer(buffer)
+        data = buffer.getvalue()
+        self.instrumentation.count('bytes_written', len(data))
+        return name, data
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+    渲染结果的LRU缓存：替换值相同的行直接复用已渲染的文件字节
+    
+    容量同时受条目数和总字节数限制，超出时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # 缓存键 -> 各输出文件的字节列表
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key):
+        """查找缓存，命中时返回字节列表并标记为最近使用，否则返回None"""
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        加入缓存
+        
+        Args:
+            key: 缓存键（参与模板正文渲染的替换值元组）
+            data: 各输出文件的字节列表
+        """
+        size = sum(len(item) for item in data)
+        if size > self.max_bytes:
+            # 单个条目超过容量上限时不缓存
+            return
+        if key in self.entries:
+            self.size -= sum(len(item) for item in self.entries.pop(key))
+        self.entries[key] = data
+        self.size += size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= sum(len(item) for item in evicted)
+            self.evictions += 1
+
+    def summary(self):
+        """缓存命中统计"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return (f"渲染缓存: 命中 {self.hits} 次，未命中 {self.misses} 次（命中率 {rate:.1f}%），"
+                f"淘汰 {self.evictions} 次")
@@ -0,0 +1,335 @@
+import io
+import os
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .utils import split_replace_items
+
+CONTENT_TYPES = {
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'pdf': 'application/pdf',
+}
+LATENCY_WINDOW = 10000  # 统计延迟分位数时保留的最近请求数
+
+
+class TemplateEntry:
+    """缓存中的一个编译模板"""
+
+    def __init__(self, template):
+        from .template import CompiledTemplate
+        self.template = template
+        self.layout = None  # PDF版式，首次请求PDF时生成
+        self.lock = threading.Lock()    # 保护PDF版式的生成
+        # python-docx引擎渲染时会修改模板对象，同一模板的请求需要串行；快速引擎渲染无状态，不加锁
+        self.render_lock = threading.Lock() if isinstance(template, CompiledTemplate) else nullcontext()
+
+
+class TemplateCache:
+    """编译模板的LRU缓存，键为模板路径、修改时间、大小和替换项，模板文件修改后自动重新编译"""
+
+    def __init__(self, config, max_entries=16):
+        self.config = config
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.compiling = {}     # 缓存键 -> 编译锁，同一模板的并发首次请求只编译一次
+        self.lock = threading.Lock()
+        self.pdf = None
+
+    def get(self, template_path, replace_items):
+        """
+        获取编译模板
+        
+        Returns:
+            (TemplateEntry, 是否命中缓存)
+        """
+        path = os.path.abspath(template_path)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Word模板不存在: {template_path}")
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size, tuple(sorted(replace_items)))
+        with self.lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry, True
+            compile_lock = self.compiling.setdefault(key, threading.Lock())
+
+        with compile_lock:
+            # 等待期间其他请求可能已完成编译
+            with self.lock:
+                entry = self._lookup(key)
+            if entry is not None:
+                return entry, True
+
+            from .template import load_template
+            font_color = getattr(self.config, 'font_color', 'red')
+            engine = getattr(self.config, 'render_engine', 'auto')
+            compression_level = getattr(self.config, 'compression_level', 6)
+            try:
+                entry = TemplateEntry(load_template(path, replace_items, font_color, engine, compression_level))
+                with self.lock:
+                    self.entries[key] = entry
+                    while len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+            finally:
+                with self.lock:
+                    self.compiling.pop(key, None)
+        return entry, False
+
+    def _lookup(self, key):
+        """查找缓存条目并标记为最近使用（调用方需持有self.lock）"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def pdf_converter(self):
+        """PDF转换器（每个进程只注册一次字体）"""
+        with self.lock:
+            if self.pdf is None:
+                from .pdf_converter import PDFConverter
+                self.pdf = PDFConverter(self.config)
+            return self.pdf
+
+
+def render_request(cache, request):
+    """
+    渲染一个请求
+    
+    Args:
+        cache: TemplateCache
+        request: {'template': 模板路径, 'values': {替换项: 值},
+                  'items': 替换项（可选，默认为配置中的替换项，未配置时为values的键）,
+                  'format': 'docx' 或 'pdf'}
+    
+    Returns:
+        (文件字节, 格式, 是否命中模板缓存)
+    """
+    from .formatting import ValueFormatter
+
+    template_path = request.get('template')
+    values = request.get('values') or {}
+    if not isinstance(values, dict):
+        raise ValueError("values应为JSON对象")
+    output_format = request.get('format', 'docx')
+    if not template_path:
+        raise ValueError("请求缺少template")
+    if output_format not in CONTENT_TYPES:
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    # 默认使用配置中的替换项，避免按请求键顺序替换时较短的替换项破坏较长的替换项，也避免缓存碎片化
+    items = request.get('items') or getattr(cache.config, 'replace_items', None) or list(values)
+    if isinstance(items, str):
+        items = [items]
+    items = split_replace_items(items)
+
+    # 与批量生成使用相同的值格式化规则
+    formatter = ValueFormatter(getattr(cache.config, 'column_formats', None))
+    _, row = formatter.format_rows(items, [(0, values)])[0]
+
+    entry, hit = cache.get(template_path, items)
+    buffer = io.BytesIO()
+    if output_format == 'pdf':
+        pdf = cache.pdf_converter()
+        with entry.lock:
+            if entry.layout is None:
+                entry.layout = pdf.compile_layout(getattr(entry.template, 'compiled', entry.template))
+        pdf.render_pdf(entry.layout, row, buffer)
+    else:
+        with entry.render_lock:
+            document = entry.template.render(row)
+            entry.template.write(document, buffer)
+    return buffer.getvalue(), output_format, hit
+
+
+# 工作进程中的模板缓存
+_worker_cache = None
+
+
+def _init_worker(config, max_templates):
+    global _worker_cache
+    _worker_cache = TemplateCache(config, max_templates)
+
+
+def _render_in_worker(request):
+    return render_request(_worker_cache, request)
+
+
+class ServerStats:
+    """请求计数、延迟分位数和吞吐量"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes_sent = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds, size=0, hit=None, error=False):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.bytes_sent += size
+            if hit is not None:
+                self.cache_hits += hit
+                self.cache_misses += not hit
+            self.latencies.append(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            uptime = time.time() - self.started
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+            return {
+                'uptime_seconds': round(uptime, 1),
+                'requests': self.requests,
+                'errors': self.errors,
+                'requests_per_second': round(self.requests / uptime, 2) if uptime else 0,
+                'bytes_sent': self.bytes_sent,
+                'template_cache_hits': self.cache_hits,
+                'template_cache_misses': self.cache_misses,
+                'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)},
+            }
+
+
+class RenderService:
+    """
+    渲染服务：单进程时在请求线程中渲染，多进程时交给工作进程池
+    （每个工作进程有自己的模板缓存）
+    """
+
+    def __init__(self, config, workers=1, max_templates=16):
+        self.config = config
+        self.workers = workers
+        self.max_templates = max_templates
+        self.stats = ServerStats()
+        self.cache = None
+        self.executor = None
+        self.lock = threading.Lock()
+        if workers > 1:
+            self.executor = self._new_executor()
+        else:
+            self.cache = TemplateCache(config, max_templates)
+
+    def _new_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.config, self.max_templates))
+
+    def render(self, request):
+        if self.executor is None:
+            return render_request(self.cache, request)
+        from concurrent.futures.process import BrokenProcessPool
+        executor = self.executor
+        try:
+            return executor.submit(_render_in_worker, request).result()
+        except BrokenProcessPool as e:
+            # 工作进程异常退出：重建进程池（并发请求只重建一次），后续请求不受影响
+            with self.lock:
+                if self.executor is executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = self._new_executor()
+            raise RuntimeError("工作进程异常退出，进程池已重建") from e
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP接口:
+        POST /render  请求体为JSON，返回docx或PDF文件
+        GET  /stats   返回延迟和吞吐量统计
+        GET  /health  健康检查
+    """
+
+    def do_GET(self):
+        if self.path == '/stats':
+            stats = self.server.service.stats.snapshot()
+            stats['workers'] = self.server.service.workers
+            self._send_json(200, stats)
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"未知的路径: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/render':
+            self._send_json(404, {'error': f"未知的路径: {self.path}"})
+            return
+        service = self.server.service
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            if not isinstance(request, dict):
+                raise ValueError("请求体应为JSON对象")
+        except ValueError as e:
+            service.stats.record(time.perf_counter() - start, error=True)
+            self._send_json(400, {'error': f"请求格式错误: {str(e)}"})
+            return
+
+        try:
+            data, output_format, hit = service.render(request)
+        except (ValueError, FileNotFoundError) as e:
+            service.stats.record(time.perf_counter() - start, error=True)
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            service.stats.record(time.perf_counter() - start, error=True)
+            self._send_json(500, {'error': f"渲染失败: {str(e)}"})
+            return
+
+        elapsed = time.perf_counter() - start
+        service.stats.record(elapsed, len(data), hit)
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[output_format])
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Render-Ms', f'{elapsed * 1000:.2f}')
+        self.send_header('X-Template-Cache', 'hit' if hit else 'miss')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # 不逐条输出访问日志，统计信息通过 /stats 获取
+        pass
+
+
+def serve(config, port=8765, workers=1, max_templates=16):
+    """
+    启动本地渲染服务（只监听127.0.0.1），按Ctrl+C停止
+    
+    Args:
+        config: 配置（字体颜色、渲染引擎、列格式规则等）
+        port: 监听端口
+        workers: 渲染工作进程数，1表示在请求线程中渲染
+        max_templates: 每个进程缓存的编译模板数
+    """
+    service = RenderService(config, workers, max_templates)
+    server = ThreadingHTTPServer(('127.0.0.1', port), RenderRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"渲染服务已启动: http://127.0.0.1:{server.server_address[1]}（工作进程: {workers}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n渲染服务已停止")
+    finally:
+        server.server_close()
+        service.close()
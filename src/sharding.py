@@ -0,0 +1,115 @@
+import os
+import json
+import zlib
+from .manifest import RenderManifest, MANIFEST_NAME
+
+
+def parse_shard(spec):
+    """
+    解析分片参数
+    
+    Args:
+        spec: 形如 "i/N" 的字符串，i从1开始
+    
+    Returns:
+        (分片序号（从0开始）, 分片总数)
+    """
+    try:
+        index, count = (int(part) for part in str(spec).split('/'))
+    except ValueError:
+        raise ValueError(f"分片参数格式应为 i/N: {spec}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"分片序号应在 1 到 {count} 之间: {spec}")
+    return index - 1, count
+
+
+def shard_manifest_name(index, count):
+    """分片运行写入的部分清单文件名"""
+    return f'render_manifest.shard-{index + 1}-of-{count}.jsonl'
+
+
+class ShardFilter:
+    """按行索引或键列哈希把数据行确定地分配给N个分片之一"""
+
+    def __init__(self, index, count, key=None):
+        self.index = index
+        self.count = count
+        self.key = key
+
+    def owns(self, row_index, row):
+        """该行是否属于当前分片"""
+        if self.key is None:
+            value = row_index
+        else:
+            # 使用稳定的哈希，保证不同机器、不同进程的分配结果一致
+            value = zlib.crc32(str(row[self.key]).encode('utf-8'))
+        return value % self.count == self.index
+
+    def __str__(self):
+        basis = f"按列 {self.key} 的哈希" if self.key else "按行号"
+        return f"第 {self.index + 1}/{self.count} 片（{basis}分配）"
+
+
+def merge_shards(config, count):
+    """
+    合并各分片的部分清单：校验每行恰好由一个分片生成且各分片输出文件名不重复，
+    通过后写入完整的渲染清单
+    
+    Args:
+        config: 配置（用于定位输出目录和数据文件）
+        count: 分片总数
+    
+    Returns:
+        合并后的行数
+    """
+    from .excel_handler import ExcelHandler
+
+    output_dir = config.output_dir
+    produced = {}   # 行索引 -> (分片序号, 记录)
+    owners = {}     # 规范化输出文件名 -> (分片序号, 行索引)
+    problems = []
+    for index in range(count):
+        name = shard_manifest_name(index, count)
+        if not os.path.exists(os.path.join(output_dir, name)):
+            problems.append(f"缺少分片清单: {name}")
+            continue
+        # 同一行记录多次时（中断后续跑）以最后一次为准
+        rows = {entry['row']: entry for entry in RenderManifest(output_dir, name).read_entries()}
+        for row, entry in rows.items():
+            if row in produced:
+                problems.append(f"第 {row + 1} 行同时由第 {produced[row][0] + 1} 片和第 {index + 1} 片生成")
+                continue
+            produced[row] = (index, entry)
+            for filename in entry.get('outputs', []):
+                key = filename.casefold()
+                if key in owners and owners[key][0] != index:
+                    other, other_row = owners[key]
+                    problems.append(f"文件名 {filename} 重复: 第 {other + 1} 片第 {other_row + 1} 行"
+                                    f"与第 {index + 1} 片第 {row + 1} 行")
+                owners.setdefault(key, (index, row))
+
+    # 与数据文件核对，找出没有被任何分片生成的行
+    config.excel_path = config.get_data_path()
+    _, _, chunks = ExcelHandler(config).stream_data()
+    expected = {row for chunk in chunks for row, _ in chunk}
+    missing = sorted(expected - set(produced))
+    if missing:
+        sample = '、'.join(str(row + 1) for row in missing[:10])
+        problems.append(f"有 {len(missing)} 行没有生成: 第 {sample} 行" + ("等" if len(missing) > 10 else ""))
+    extra = sorted(set(produced) - expected)
+    if extra:
+        problems.append(f"有 {len(extra)} 行不在当前数据文件中，请确认各分片使用的是同一份数据")
+
+    if problems:
+        shown = problems[:20]
+        if len(problems) > 20:
+            shown.append(f"……共 {len(problems)} 个问题")
+        raise ValueError("分片合并校验失败:\n" + '\n'.join(shown))
+
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for row in sorted(produced):
+            f.write(json.dumps(produced[row][1], ensure_ascii=False) + '\n')
+    os.replace(temp_path, path)
+    return len(produced)
@@ -0,0 +1,281 @@
+import copy
+from bisect import bisect_right
+from docx import Document
+from docx.document import Document as DocumentProxy
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.part import PartFactory, XmlPart
+from docx.oxml.ns import qn
+from docx.shared import RGBColor
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+from .matcher import PlaceholderMatcher
+from .zip_writer import read_raw_entries, deflate_entry, write_zip
+
+
+# 段落文本中代替超链接、修订等嵌套run容器的分隔字符，匹配不会跨越这些容器
+BOUNDARY = '\x00'
+RUN_TAG = qn('w:r')
+
+
+class ParagraphIndex:
+    """
+    段落的run偏移索引：将拼接后的段落文本偏移映射回对应的run
+    
+    只索引段落的直接子run；包含run的其他子元素（w:hyperlink、w:ins、w:smartTag、
+    w:fldSimple等）在文本中以分隔字符占位，避免把容器两侧的文本拼成替换项
+    """
+
+    def __init__(self, paragraph):
+        self.runs = []
+        self.texts = []
+        self.starts = []
+        chunks = []
+        offset = 0
+        for child in paragraph._p:
+            if child.tag == RUN_TAG:
+                run = Run(child, paragraph)
+                self.runs.append(run)
+                self.texts.append(run.text)
+                self.starts.append(offset)
+                chunks.append(run.text)
+                offset += len(run.text)
+            elif next(child.iter(RUN_TAG), None) is not None:
+                chunks.append(BOUNDARY)
+                offset += 1
+        self.text = ''.join(chunks)
+
+    def locate(self, offset):
+        """返回偏移所在的 (run序号, run内偏移)"""
+        index = bisect_right(self.starts, offset) - 1
+        # 跳过空run，定位到实际包含该字符的run
+        while index < len(self.runs) - 1 and offset - self.starts[index] >= len(self.texts[index]):
+            index += 1
+        return index, offset - self.starts[index]
+
+
+# 除主文档外可能包含替换项的部件
+STORY_RELTYPES = (RT.HEADER, RT.FOOTER, RT.FOOTNOTES, RT.ENDNOTES)
+
+# python-docx没有脚注、尾注的部件类型（会作为二进制部件加载），注册为通用XML部件，
+# 使其中的替换项可以定位，保存时由修改后的XML重新生成
+PartFactory.part_type_for.setdefault(CT.WML_FOOTNOTES, XmlPart)
+PartFactory.part_type_for.setdefault(CT.WML_ENDNOTES, XmlPart)
+
+
+class TemplatePart:
+    """模板包中的一个XML部件（主文档、页眉、页脚等）及其中需要修改的run"""
+
+    def __init__(self, part):
+        self.part = part
+        self.partname = part.partname.lstrip('/')
+        self.pristine = copy.deepcopy(part._element)
+        self.edits = []         # (run路径, 文本片段, 是否着色)，片段为 (是否替换项, 文本) 列表
+        self.edit_parts = {}    # run路径 -> 文本片段
+
+
+class CompiledTemplate:
+    """编译后的Word模板：模板只解析一次，每行数据从其副本渲染"""
+
+    def __init__(self, template_path, replace_items, font_color='red', compression_level=6):
+        self.template_path = template_path
+        self.replace_items = replace_items
+        self.compression_level = compression_level
+        self.matcher = PlaceholderMatcher(replace_items)
+        self.rgb_color = RGBColor(255, 0, 0) if font_color == 'red' else RGBColor(0, 0, 0)
+
+        # 解析模板（整个批次只执行一次）
+        self.document = Document(template_path)
+        self.part = self.document.part
+
+        # 扫描所有部件，记录每个替换项所在的部件和run位置
+        self.locations = {}     # 替换项 -> [(部件名, run路径), ...]
+        stories = [TemplatePart(part) for part in self._iter_story_parts()]
+        for story in stories:
+            self._locate_placeholders(story)
+        self.pristine = stories[0].pristine
+        self.edit_parts = stories[0].edit_parts
+        # 只有包含替换项的部件需要在每行渲染时处理
+        self.parts = [story for story in stories if story.edits]
+
+        # 模板包中各条目的原始压缩数据，保存时未修改的部件直接复制
+        self.raw_entries = read_raw_entries(template_path)
+        names = {entry.name for entry in self.raw_entries}
+        self.passthrough = all(story.partname in names for story in self.parts)
+
+    def _iter_story_parts(self):
+        """主文档部件及其引用的页眉、页脚、脚注和尾注部件"""
+        yield self.part
+        seen = {self.part.partname}
+        for rel in self.part.rels.values():
+            if rel.is_external or rel.reltype not in STORY_RELTYPES:
+                continue
+            part = rel.target_part
+            # 未被python-docx解析为XML的部件无法定位替换项
+            if part.partname in seen or not hasattr(part, '_element'):
+                continue
+            seen.add(part.partname)
+            yield part
+
+    def _locate_placeholders(self, story):
+        """
+        扫描部件中的所有段落（包括嵌套表格和文本框），按段落拼接文本匹配替换项
+        （包括被拆分到多个run中的替换项）
+        """
+        for p in story.pristine.iter(qn('w:p')):
+            index = ParagraphIndex(Paragraph(p, None))
+            matches = list(self.matcher.finditer(index.text))
+            if matches:
+                self._compile_paragraph(story, index, matches)
+
+    def _compile_paragraph(self, story, index, matches):
+        """将段落中的匹配转换为各run的文本片段"""
+        parts = {}      # run序号 -> 片段列表
+        colored = set()
+        cursor = {}     # run序号 -> 已处理到的run内偏移
+
+        def keep(run_index, end):
+            """保留run中从上次处理位置到end的原文"""
+            start = cursor.get(run_index, 0)
+            if end > start:
+                parts.setdefault(run_index, []).append((False, index.texts[run_index][start:end]))
+            cursor[run_index] = end
+
+        for match in matches:
+            first, first_offset = index.locate(match.start())
+            last, last_offset = index.locate(match.end() - 1)
+
+            # 替换值放在替换项起始的run中，保留该run的格式
+            keep(first, first_offset)
+            parts.setdefault(first, []).append((True, match.group()))
+            colored.add(first)
+            self.locations.setdefault(match.group(), []).append(
+                (story.partname, self._element_path(index.runs[first]._r)))
+
+            # 删除后续run中属于该替换项的文本
+            if last == first:
+                cursor[first] = last_offset + 1
+            else:
+                cursor[first] = len(index.texts[first])
+                for middle in range(first + 1, last):
+                    parts.setdefault(middle, [])
+                    cursor[middle] = len(index.texts[middle])
+                parts.setdefault(last, [])
+                cursor[last] = last_offset + 1
+
+        for run_index in sorted(parts):
+            keep(run_index, len(index.texts[run_index]))
+            path = self._element_path(index.runs[run_index]._r)
+            story.edits.append((path, parts[run_index], run_index in colored))
+            story.edit_parts[path] = parts[run_index]
+
+    def _element_path(self, element):
+        """计算元素相对于部件根节点的子节点索引路径"""
+        path = []
+        parent = element.getparent()
+        while parent is not None:
+            path.append(parent.index(element))
+            element, parent = parent, parent.getparent()
+        return tuple(reversed(path))
+
+    def paragraph_parts(self):
+        """
+        按正文段落返回模板的文本片段，供不经过docx直接生成PDF使用
+        
+        Returns:
+            [(段落对齐方式, [(是否替换项, 文本), ...]), ...]
+        """
+        document = DocumentProxy(self.pristine, self.part)
+        result = []
+        for paragraph in document.paragraphs:
+            parts = []
+            for run in paragraph.runs:
+                edit = self.edit_parts.get(self._element_path(run._r))
+                parts.extend(edit if edit is not None else [(False, run.text)])
+            result.append((paragraph.alignment, parts))
+        return result
+
+    def render(self, values):
+        """
+        基于模板副本渲染一行数据
+        
+        Args:
+            values: 替换项 -> 替换值 的字典
+        """
+        # 只复制包含替换项的部件，其他部件共享
+        roots = []
+        for story in self.parts:
+            root = copy.deepcopy(story.pristine)
+            story.part._element = root
+            roots.append(root)
+        document = self.part.document
+
+        # 替换位置在编译时已确定，每行只访问记录的run
+        for story, root in zip(self.parts, roots):
+            for path, parts, colored in story.edits:
+                element = root
+                for index in path:
+                    element = element[index]
+                run = Run(element, document)
+                run.text = ''.join(values[text] if is_slot else text for is_slot, text in parts)
+                if colored:
+                    run.font.color.rgb = self.rgb_color
+        return document
+
+    @property
+    def runs_touched(self):
+        """每行修改的run数量"""
+        return sum(len(story.edits) for story in self.parts)
+
+    @property
+    def placeholder_hits(self):
+        """每行替换的占位槽数量"""
+        return sum(is_slot for story in self.parts
+                   for _, parts, _ in story.edits for is_slot, _ in parts)
+
+    @property
+    def used_items(self):
+        """模板中实际出现的替换项（按替换项顺序），只有它们的值会影响渲染结果"""
+        return tuple(item for item in self.matcher.items if item in self.locations)
+
+    def write(self, document, target):
+        """保存渲染好的文档：只重新压缩修改过的部件，其他条目复制模板中的原始压缩数据"""
+        if not self.passthrough:
+            document.save(target)
+            return
+        modified = {story.partname: story.part.blob for story in self.parts}
+        write_zip(target, [
+            entry if entry.name not in modified
+            else deflate_entry(entry.name, modified[entry.name], self.compression_level, entry.date_time)
+            for entry in self.raw_entries
+        ])
+
+    def save(self, values, target):
+        """渲染一行数据并保存（target可以是路径或文件对象）"""
+        self.write(self.render(values), target)
+
+
+def load_template(template_path, replace_items, font_color='red', engine='auto', compression_level=6):
+    """
+    编译Word模板并按配置选择渲染引擎
+    
+    Args:
+        template_path: Word模板路径
+        replace_items: 替换项列表
+        font_color: 替换项字体颜色
+        engine: 渲染引擎 ('auto', 'xml', 'docx')
+        compression_level: 修改过的部件的压缩级别（0-9）
+    """
+    from .xml_renderer import XmlTemplate, UnsupportedTemplateError
+
+    compiled = CompiledTemplate(template_path, replace_items, font_color, compression_level)
+    if engine == 'docx':
+        return compiled
+
+    try:
+        return XmlTemplate(compiled)
+    except UnsupportedTemplateError as e:
+        if engine == 'xml':
+            raise
+        # 快速引擎无法处理时回退到python-docx引擎
+        print(f"快速渲染不支持该模板（{str(e)}），使用python-docx渲染")
+        return compiled
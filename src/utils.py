@@ -1,5 +1,6 @@
 import os
 import platform
+from collections import namedtuple
 
 def clear_screen():
     """清除控制台屏幕"""
@@ -34,4 +35,24 @@ def format_filename(format_str, replace_dict):
     result = format_str
     for key, value in replace_dict.items():
         result = result.replace(key, str(value))
-    return result 
\ No newline at end of file
+    return result 
+
+
+def split_replace_items(replace_items):
+    """
+    将配置中的替换项拆分为单个项目列表
+    
+    Args:
+        replace_items: 配置中的替换项（可能包含中文分号分隔的字符串）
+    """
+    items = []
+    for item in replace_items or []:
+        # 如果项目中包含分号，则分割成多个项目
+        if '；' in item:
+            items.extend([i.strip() for i in item.split('；') if i.strip()])
+        else:
+            items.append(item.strip())
+    return items
+
+# 单行渲染任务：行索引、替换值字典、各模板的输出文件名、输出目录（渲染到内存时为None）、清单记录
+RenderJob = namedtuple('RenderJob', ['index', 'values', 'filenames', 'output_dir', 'entry'])
@@ -1,123 +1,367 @@
-from docx import Document
-from docx.shared import RGBColor
 import os
-from .utils import format_filename
+import time
+import itertools
+from .utils import format_filename, split_replace_items, RenderJob
 from tqdm import tqdm
 from .excel_handler import ExcelHandler
-import pandas as pd
+from .template import load_template, CompiledTemplate
+from .filenames import FilenamePlanner
+from .pipeline import RowRenderer
+from .instrumentation import Instrumentation, NullInstrumentation
+from .manifest import RenderManifest, file_hash
+from .sharding import ShardFilter, shard_manifest_name
+from .archive import ArchiveWriter
+from .writer import BackgroundWriter
+from .render_cache import RenderCache
+from .parallel import ParallelRenderer, resolve_workers, CHUNK_SIZE, ARCHIVE_CHUNK_SIZE
 
 class WordHandler:
-    def __init__(self, config):
+    def __init__(self, config, on_row=None):
+        """
+        Args:
+            config: 配置
+            on_row: 可选回调 on_row(行索引, 状态, 输出文件名列表, 错误信息)，
+                状态为 'ok'、'skipped' 或 'failed'
+        """
         self.config = config
-        self.doc = None
+        self.on_row = on_row
+        self.archive_path = None
+        self.templates = []
+        self.row_renderer = None
+        self.filename_planners = []
+        self.manifest = None
+        self.archive = None
+        self.writer = None
+        self.cache = None
+        self.progress = None
+        self.shard = None
+        self.stats = {'rendered': 0, 'skipped': 0, 'failed': 0, 'other_shards': 0}
+        
+        # 可选的性能统计（--profile 输出汇总表，--trace 导出Chrome trace）
+        trace_path = getattr(config, 'trace_path', None)
+        if getattr(config, 'profile', False) or trace_path:
+            self.instrumentation = Instrumentation(keep_events=bool(trace_path))
+        else:
+            self.instrumentation = NullInstrumentation()
 
     def process_documents(self):
+        start = time.perf_counter()
         try:
             # 检查并设置Excel文件路径
             if not self.config.output_dir:
                 raise ValueError("输出目录未设置")
             
-            excel_path = os.path.join(self.config.output_dir, 'template.xlsx')
+            excel_path = self.config.get_data_path()
             if not os.path.exists(excel_path):
-                raise FileNotFoundError(f"Excel文件不存在: {excel_path}")
+                raise FileNotFoundError(f"数据文件不存在: {excel_path}")
             
             # 初始化ExcelHandler
             self.config.excel_path = excel_path
             excel_handler = ExcelHandler(self.config)
             
-            # 读取Excel数据
-            print(f"正在读取Excel文件: {excel_path}")
-            df = excel_handler.read_data()
-            if df.empty:
-                raise ValueError("Excel文件中没有数据")
-            
-            total_rows = len(df)
-            print(f"成功读取数据，共 {total_rows} 行")
-            
-            # 显示进度条
-            for index, row in tqdm(df.iterrows(), total=total_rows, desc="处理进度"):
-                try:
-                    # 打开一个新的Word文档副本
-                    self.doc = Document(self.config.word_template)
-                    
-                    # 对每个替换项进行处理
-                    replace_items = []
-                    for item in self.config.replace_items:
-                        # 如果项目中包含分号，则分割成多个项目
-                        if '；' in item:
-                            replace_items.extend([i.strip() for i in item.split('；') if i.strip()])
-                        else:
-                            replace_items.append(item.strip())
-                    
-                    # 检查是否所有需要的列都存在
-                    missing_columns = [item for item in replace_items if item not in df.columns]
-                    if missing_columns:
-                        raise ValueError(f"数据中缺少列: {', '.join(missing_columns)}")
-                    
-                    # 执行替换
-                    for item in replace_items:
-                        self._replace_text(item, str(row[item]))
-                    
-                    # 生成输出文件名
-                    output_filename = self._generate_filename(row)
-                    output_path = os.path.join(self.config.output_dir, output_filename)
-                    
-                    # 保存文档
-                    self.doc.save(output_path)
+            # 流式读取数据（Excel、CSV、Parquet或SQLite）
+            print(f"正在读取数据文件: {excel_path}")
+            read_start = time.perf_counter()
+            columns, total_rows, row_chunks = excel_handler.stream_data()
+            try:
+                first_chunk = next(row_chunks, None)
+                # 打开数据文件和读取第一块同样计入read_excel阶段（数据只有一块时这就是全部读取时间）
+                self.instrumentation.add_timing('read_excel', None, read_start, time.perf_counter() - read_start)
+                if first_chunk is None:
+                    raise ValueError("数据文件中没有数据")
+                chunks = itertools.chain([first_chunk], row_chunks)
+                
+                if total_rows is None:
+                    print("成功读取数据（行数需读取完成后确定）")
+                else:
+                    print(f"成功读取数据，共 {total_rows} 行")
+                
+                # 对每个替换项进行处理
+                replace_items = split_replace_items(self.config.replace_items)
+                
+                # 检查是否所有需要的列都存在
+                missing_columns = [item for item in replace_items if item not in columns]
+                if missing_columns:
+                    raise ValueError(f"数据中缺少列: {', '.join(missing_columns)}")
+                
+                # 分片运行：只处理分配给本分片的行
+                shard = getattr(self.config, 'shard', None)
+                if shard:
+                    shard_key = getattr(self.config, 'shard_key', None)
+                    if shard_key and shard_key not in columns:
+                        raise ValueError(f"数据中缺少分片键列: {shard_key}")
+                    if getattr(self.config, 'output_mode', 'files') == 'zip':
+                        raise ValueError("分片运行只支持files输出方式")
+                    self.shard = ShardFilter(shard[0], shard[1], shard_key)
+                    print(f"分片运行: {self.shard}")
+                
+                # 输出文件名在渲染前按数据块批量生成，并检测重名（包括不同模板之间）
+                templates = self.config.get_templates()
+                collision = getattr(self.config, 'filename_collision', 'suffix')
+                used_names = {}
+                self.filename_planners = [
+                    FilenamePlanner(output_format, replace_items, collision, used=used_names)
+                    for _, output_format in templates
+                ]
+                
+                # 编译所有模板（整个批次只解析一次）
+                with self.instrumentation.stage('compile'):
+                    self.templates = [
+                        self._compile_template(path, replace_items) for path, _ in templates
+                    ]
+                    self.row_renderer = RowRenderer(self.templates, self.config, self.instrumentation)
+                if len(self.templates) > 1:
+                    print(f"每行数据生成 {len(self.templates)} 个模板的文档")
+                
+                # 输出到ZIP归档时整个归档重新生成，不使用增量清单
+                if getattr(self.config, 'output_mode', 'files') == 'zip':
+                    archive_name = getattr(self.config, 'archive_name', None) or 'documents.zip'
+                    archive_path = os.path.join(self.config.output_dir, archive_name)
+                    self.archive = ArchiveWriter(archive_path)
+                    self.archive_path = archive_path
+                    print(f"输出到ZIP归档: {archive_path}")
+                # 分片运行总是写入本分片的部分清单，供合并时校验
+                elif self.shard:
+                    self.manifest = RenderManifest(
+                        self.config.output_dir, shard_manifest_name(self.shard.index, self.shard.count),
+                        resume=getattr(self.config, 'incremental', True))
+                # 增量生成：根据清单跳过输入未变化的行
+                elif getattr(self.config, 'incremental', True):
+                    self.manifest = RenderManifest(self.config.output_dir)
+                self.template_hash = ','.join(file_hash(path) for path, _ in templates)
+                
+                workers = resolve_workers(getattr(self.config, 'workers', None))
+                if total_rows:
+                    workers = min(workers, -(-total_rows // CHUNK_SIZE))
+                
+                # 单进程写文件时，渲染与写盘由后台写线程重叠执行
+                writer_threads = getattr(self.config, 'writer_threads', 0)
+                if workers == 1 and not self.archive and writer_threads:
+                    self.writer = BackgroundWriter(writer_threads, getattr(self.config, 'write_queue_depth', 32))
+                
+                # 单进程模式下，正文替换值相同的行复用已渲染的文件内容
+                if workers == 1:
+                    cache = RenderCache(getattr(self.config, 'render_cache_entries', 256),
+                                        getattr(self.config, 'render_cache_mb', 64) * 1024 * 1024)
+                    self.cache = cache if cache.enabled else None
+                    # 缓存键只包含模板中实际出现的替换项
+                    self.cache_items = tuple(dict.fromkeys(
+                        item for template in self.templates for item in template.used_items))
+                
+                # 显示进度条
+                show_progress = getattr(self.config, 'show_progress', True)
+                with tqdm(total=total_rows, desc="处理进度", disable=not show_progress) as self.progress:
+                    jobs = self._iter_jobs(chunks, replace_items)
+                    if workers > 1:
+                        self._process_parallel(jobs, replace_items, workers)
+                    else:
+                        self._process_serial(jobs)
+                    if self.writer:
+                        self._close_writer()
+                
+                if self.archive:
+                    self.archive.close()
+                    self.archive = None
+                if self.manifest:
+                    removed = self.manifest.finish()
+                    if removed:
+                        print(f"已删除 {removed} 个过期的输出文件")
+                self._print_summary()
+                if self.cache:
+                    print(self.cache.summary())
+                if self.instrumentation.enabled:
+                    self._report_instrumentation(time.perf_counter() - start)
                     
-                except Exception as e:
-                    print(f"\n处理第 {index + 1} 行数据时出错: {str(e)}")
-                    continue
+            finally:
+                # 确保工作簿和清单文件被关闭，未完成的归档被丢弃
+                row_chunks.close()
+                if self.manifest:
+                    self.manifest.close()
+                if self.archive:
+                    self.archive.abort()
+                    self.archive = None
+                if self.writer:
+                    self.writer.close()
+                    self.writer = None
                     
         except Exception as e:
             raise Exception(f"处理文档失败: {str(e)}")
 
-    def _replace_text(self, old_text, new_text):
-        """替换文档中的文本"""
-        # 获取字体颜色设置，默认为红色
+    def _iter_jobs(self, chunks, replace_items):
+        """生成每行的渲染任务，跳过输入未变化的行"""
         font_color = getattr(self.config, 'font_color', 'red')
-        rgb_color = RGBColor(255, 0, 0) if font_color == 'red' else RGBColor(0, 0, 0)
-        
-        # 处理空值或nan
-        if pd.isna(new_text) or str(new_text).strip() == '':
-            new_text = 'N/A'
-        
-        for paragraph in self.doc.paragraphs:
-            if old_text in paragraph.text:
-                inline = paragraph.runs
-                for item in inline:
-                    if old_text in item.text:
-                        item.text = item.text.replace(old_text, str(new_text))
-                        item.font.color.rgb = rgb_color
+        instrumentation = self.instrumentation
+        for chunk in self._iter_chunks(chunks):
+            # 整块数据的输出文件名一次生成（每个模板一列）。
+            # 分片运行时也为所有行生成文件名，使各分片的重名处理结果一致
+            with instrumentation.stage('filename'):
+                planned = [planner.plan(chunk) for planner in self.filename_planners]
+            
+            for (index, row), filenames in zip(chunk, zip(*planned)):
+                if self.shard and not self.shard.owns(index, row):
+                    self.stats['other_shards'] += 1
+                    self.progress.update(1)
+                    continue
+                try:
+                    for filename in filenames:
+                        if isinstance(filename, Exception):
+                            raise filename
+                    with instrumentation.stage('values', index):
+                        values = {item: row[item] for item in replace_items}
+                    
+                    if self.archive:
+                        for name in self.row_renderer.output_names(filenames):
+                            self.archive.reserve(name, index)
+                        output_dir = None
+                    elif self.writer:
+                        # 渲染到内存，由后台写线程写盘
+                        output_dir = None
+                    else:
+                        output_dir = self.config.output_dir
+                except Exception as e:
+                    self._on_row_done(RenderJob(index, None, None, None, None), str(e))
+                    continue
+                
+                entry = None
+                if self.manifest:
+                    with instrumentation.stage('manifest', index):
+                        entry = self.manifest.make_entry(index, values, self.template_hash, font_color,
+                                                         self.row_renderer.output_names(filenames))
+                        current = self.manifest.is_current(entry)
+                    if current:
+                        self.stats['skipped'] += 1
+                        if self.on_row:
+                            self.on_row(index, 'skipped', entry['outputs'], None)
+                        self.progress.update(1)
+                        continue
+                yield RenderJob(index, values, filenames, output_dir, entry)
+
+    def _iter_chunks(self, chunks):
+        """逐块遍历数据，统计读取Excel的耗时"""
+        chunks = iter(chunks)
+        while True:
+            with self.instrumentation.stage('read_excel'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
 
-        for table in self.doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    if old_text in cell.text:
-                        for paragraph in cell.paragraphs:
-                            for run in paragraph.runs:
-                                if old_text in run.text:
-                                    run.text = run.text.replace(old_text, str(new_text))
-                                    run.font.color.rgb = rgb_color
+    def _submit_write(self, job, outputs):
+        """将渲染结果交给后台写线程，并处理已完成的写盘结果"""
+        files = [(os.path.join(self.config.output_dir, name), data) for name, data in outputs]
+        self.writer.submit(job, files)
+        self._drain_writer()
 
-    def _generate_filename(self, row):
-        """生成输出文件名"""
-        filename = self.config.output_format
+    def _drain_writer(self):
+        """处理已完成的写盘结果（写盘错误归属到对应的行）"""
+        for job, error, start, duration in self.writer.completed():
+            self.instrumentation.add_timing('write', job.index, start, duration)
+            self._on_row_done(job, error)
+
+    def _close_writer(self):
+        """等待后台写线程写完所有文件"""
+        self.writer.close()
+        self._drain_writer()
+        self.writer = None
+
+    def _on_row_done(self, job, error, outputs=None):
+        """一行处理完成：写入归档、记录结果并更新进度"""
+        if error is None and outputs:
+            try:
+                for name, data in outputs:
+                    self.archive.add(name, data, job.index)
+            except Exception as e:
+                error = str(e)
         
-        # 替换文件名中的标记
-        replace_items = []
-        for item in self.config.replace_items:
-            if '；' in item:
-                replace_items.extend([i.strip() for i in item.split('；') if i.strip()])
+        if error is not None:
+            self.stats['failed'] += 1
+            self.instrumentation.count('rows_failed')
+            tqdm.write(f"\n处理第 {job.index + 1} 行数据时出错: {error}")
+            if self.on_row:
+                self.on_row(job.index, 'failed', [], error)
+        else:
+            self.stats['rendered'] += 1
+            self.instrumentation.count('rows_rendered')
+            if job.entry is not None:
+                self.manifest.record(job.entry)
+            if self.on_row:
+                self.on_row(job.index, 'ok', self.row_renderer.output_names(job.filenames), None)
+        self.progress.update(1)
+
+    def _process_serial(self, jobs):
+        """在当前进程中逐行渲染"""
+        for job in jobs:
+            try:
+                if self.cache:
+                    outputs = self._render_cached(job)
+                else:
+                    # 从编译模板渲染并保存文档（写入归档时先渲染到内存）
+                    outputs = self.row_renderer.render(job)
+            except Exception as e:
+                self._on_row_done(job, str(e))
+                continue
+            if self.writer:
+                self._submit_write(job, outputs)
             else:
-                replace_items.append(item.strip())
-                
-        for item in replace_items:
-            if item in filename:
-                filename = filename.replace(item, str(row[item]))
-                
-        # 确保文件名有.docx后缀
-        if not filename.lower().endswith('.docx'):
-            filename += '.docx'
-            
-        return filename 
\ No newline at end of file
+                self._on_row_done(job, None, outputs)
+
+    def _render_cached(self, job):
+        """
+        通过渲染缓存处理一行：命中时直接使用缓存的文件字节，未命中时渲染到内存并加入缓存
+        
+        Returns:
+            与 RowRenderer.render 相同
+        """
+        key = tuple(job.values[item] for item in self.cache_items)
+        names = self.row_renderer.output_names(job.filenames)
+        data = self.cache.get(key)
+        if data is None:
+            outputs = self.row_renderer.render(job._replace(output_dir=None))
+            data = [content for _, content in outputs]
+            self.cache.put(key, data)
+        else:
+            self.instrumentation.count('cache_hits')
+        
+        outputs = list(zip(names, data))
+        if job.output_dir is None:
+            return outputs
+        with self.instrumentation.stage('write', job.index):
+            for name, content in outputs:
+                with open(os.path.join(job.output_dir, name), 'wb') as f:
+                    f.write(content)
+        return None
+
+    def _process_parallel(self, jobs, replace_items, workers):
+        """使用多个工作进程渲染"""
+        tqdm.write(f"使用 {workers} 个工作进程")
+        
+        # 工作进程直接使用主进程已确定的渲染引擎，避免重复回退提示
+        engines = ['docx' if isinstance(template, CompiledTemplate) else 'xml' for template in self.templates]
+        chunk_size = ARCHIVE_CHUNK_SIZE if self.archive else CHUNK_SIZE
+        renderer = ParallelRenderer(self.config, replace_items, engines, workers, chunk_size,
+                                    self.instrumentation)
+        renderer.run(jobs, self._on_row_done)
+
+    def _print_summary(self):
+        """输出本次处理的统计信息"""
+        print(f"\n已生成 {self.stats['rendered']} 行，"
+              f"跳过 {self.stats['skipped']} 行（未变化），"
+              f"失败 {self.stats['failed']} 行")
+        if self.shard:
+            print(f"其余 {self.stats['other_shards']} 行由其他分片处理")
+
+    def _report_instrumentation(self, elapsed):
+        """输出性能统计汇总表，并按需导出Chrome trace"""
+        print("\n性能统计（多进程模式下各阶段耗时为所有进程之和）:")
+        print(self.instrumentation.summary_table(elapsed))
+        trace_path = getattr(self.config, 'trace_path', None)
+        if trace_path:
+            self.instrumentation.export_trace(trace_path)
+            print(f"已导出trace文件: {trace_path}")
+
+    def _compile_template(self, template_path, replace_items):
+        """解析Word模板并记录替换项位置，按配置选择渲染引擎"""
+        font_color = getattr(self.config, 'font_color', 'red')
+        engine = getattr(self.config, 'render_engine', 'auto')
+        compression_level = getattr(self.config, 'compression_level', 6)
+        return load_template(template_path, replace_items, font_color, engine, compression_level)
@@ -0,0 +1,71 @@
+import os
+import time
+import queue
+import threading
+
+
+class BackgroundWriter:
+    """后台写盘：渲染好的文件字节进入有界队列，由写线程以临时文件+重命名的方式原子写入"""
+
+    def __init__(self, threads=2, queue_depth=32):
+        # 队列有界：渲染速度超过写盘速度时提交会阻塞，内存占用不超过队列深度
+        self.queue = queue.Queue(maxsize=queue_depth)
+        self.done = queue.Queue()
+        self.threads = [
+            threading.Thread(target=self._run, name=f'writer-{i}', daemon=True)
+            for i in range(threads)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, job, files):
+        """
+        提交一行的输出文件
+        
+        Args:
+            job: 对应的渲染任务（写盘结果按任务返回，错误可以归属到具体行）
+            files: [(文件路径, 文件字节), ...]
+        """
+        self.queue.put((job, files))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            job, files = item
+            start = time.perf_counter()
+            try:
+                for path, data in files:
+                    self._write_atomic(path, data)
+                error = None
+            except Exception as e:
+                error = str(e)
+            self.done.put((job, error, start, time.perf_counter() - start))
+
+    def _write_atomic(self, path, data):
+        """先写入临时文件再重命名，避免留下写了一半的文档"""
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def completed(self):
+        """取出已完成的写盘结果：(任务, 错误信息, 开始时间, 耗时)"""
+        while True:
+            try:
+                yield self.done.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        """等待队列中的文件全部写完并停止写线程"""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
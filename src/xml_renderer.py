@@ -0,0 +1,122 @@
+import re
+from xml.sax.saxutils import escape
+from docx.oxml.ns import qn
+from lxml import etree
+from .zip_writer import deflate_entry, write_zip
+
+# 占位标记使用Unicode私用区字符，正常文档中不会出现
+SLOT_OPEN = '\ue000'
+SLOT_CLOSE = '\ue001'
+SLOT_PATTERN = re.compile(f'{SLOT_OPEN}(\\d+){SLOT_CLOSE}')
+
+# XML 1.0 不允许出现的控制字符
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# 替换值中的制表符和换行需要转换为对应的Word元素
+TEXT_BREAKS = {
+    '\t': '</w:t><w:tab/><w:t xml:space="preserve">',
+    '\n': '</w:t><w:br/><w:t xml:space="preserve">',
+    '\r': '</w:t><w:br/><w:t xml:space="preserve">',
+}
+TEXT_BREAK_PATTERN = re.compile('[\t\n\r]')
+
+
+class UnsupportedTemplateError(Exception):
+    """模板包含快速渲染无法处理的结构"""
+
+
+class XmlTemplate:
+    """基于原始XML/ZIP的快速渲染引擎：包含替换项的各部件XML预先拆分为文本片段和占位槽"""
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.partnames = [story.partname for story in compiled.parts]
+
+        # 未修改的部件直接使用模板中的原始压缩数据（保持原有顺序）
+        names = [entry.name for entry in compiled.raw_entries]
+        missing = [name for name in self.partnames if name not in names]
+        if missing:
+            raise UnsupportedTemplateError(f"模板中找不到部件: {', '.join(missing)}")
+        self.names = names
+        self.entries = [None if entry.name in self.partnames else entry for entry in compiled.raw_entries]
+        self.date_times = {
+            entry.name: entry.date_time for entry in compiled.raw_entries if entry.name in self.partnames
+        }
+
+        self.stories = self._split_parts()
+
+    def _split_parts(self):
+        """用占位标记渲染一次模板，再按标记拆分各部件序列化后的XML"""
+        items = self.compiled.replace_items
+        for story in self.compiled.parts:
+            pristine = etree.tostring(story.pristine, encoding='unicode')
+            if SLOT_OPEN in pristine or SLOT_CLOSE in pristine:
+                raise UnsupportedTemplateError(f"模板中包含保留的占位字符: {story.partname}")
+
+        markers = {item: f'{SLOT_OPEN}{i}{SLOT_CLOSE}' for i, item in enumerate(items)}
+        self.compiled.render(markers)
+
+        stories = []
+        for story in self.compiled.parts:
+            root = story.part._element
+            # 包含占位标记的文本需要保留空白，否则替换值首尾的空格会被Word忽略
+            for t in root.iter(qn('w:t')):
+                if t.text and SLOT_OPEN in t.text:
+                    t.set(qn('xml:space'), 'preserve')
+
+            xml = etree.tostring(root, encoding='UTF-8', standalone=True).decode('utf-8')
+            parts = SLOT_PATTERN.split(xml)
+            segments = parts[0::2]
+            slots = [items[int(i)] for i in parts[1::2]]
+            if any(SLOT_OPEN in s or SLOT_CLOSE in s for s in segments):
+                raise UnsupportedTemplateError("占位标记被拆分，无法定位替换位置")
+            stories.append((segments, slots))
+        return stories
+
+    def _escape(self, text):
+        """转义替换值，并将制表符和换行转换为Word元素"""
+        if INVALID_XML_CHARS.search(text):
+            raise ValueError(f"替换值包含XML不支持的控制字符: {text!r}")
+        text = escape(text)
+        return TEXT_BREAK_PATTERN.sub(lambda m: TEXT_BREAKS[m.group()], text)
+
+    @property
+    def runs_touched(self):
+        """每行修改的run数量"""
+        return self.compiled.runs_touched
+
+    @property
+    def placeholder_hits(self):
+        """每行替换的占位槽数量"""
+        return sum(len(slots) for _, slots in self.stories)
+
+    @property
+    def used_items(self):
+        """模板中实际出现的替换项"""
+        return self.compiled.used_items
+
+    def render(self, values):
+        """拼接文本片段和转义后的替换值，生成各部件的XML内容"""
+        rendered = []
+        for segments, slots in self.stories:
+            out = [segments[0]]
+            for slot, segment in zip(slots, segments[1:]):
+                out.append(self._escape(values[slot]))
+                out.append(segment)
+            rendered.append(''.join(out).encode('utf-8'))
+        return rendered
+
+    def write(self, rendered, target):
+        """将渲染好的部件XML与其他未修改的部件写成docx文件"""
+        modified = {
+            name: deflate_entry(name, data, self.compiled.compression_level, self.date_times[name])
+            for name, data in zip(self.partnames, rendered)
+        }
+        write_zip(target, [
+            modified[name] if entry is None else entry
+            for name, entry in zip(self.names, self.entries)
+        ])
+
+    def save(self, values, target):
+        """渲染一行数据并写入docx文件（target可以是路径或文件对象）"""
+        self.write(self.render(values), target)
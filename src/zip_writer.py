@@ -0,0 +1,118 @@
+import struct
+import zlib
+import zipfile
+
+# ZIP文件结构常量
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_RECORD = struct.Struct('<IHHHHIIH')
+LOCAL_SIGNATURE = 0x04034b50
+CENTRAL_SIGNATURE = 0x02014b50
+END_SIGNATURE = 0x06054b50
+UTF8_FLAG = 0x800
+VERSION = 20
+
+
+class ZipEntry:
+    """已压缩好的ZIP条目，可直接写入归档而无需再次压缩"""
+
+    def __init__(self, name, data, crc, file_size, method=zlib.DEFLATED, date_time=(1980, 1, 1, 0, 0, 0)):
+        self.name = name
+        self.data = data            # 压缩后的字节
+        self.crc = crc
+        self.file_size = file_size  # 压缩前大小
+        self.method = method
+        self.date_time = date_time
+
+
+def deflate_entry(name, data, level=6, date_time=(1980, 1, 1, 0, 0, 0)):
+    """
+    压缩数据并生成ZIP条目
+    
+    Args:
+        name: 条目名称
+        data: 未压缩的字节
+        level: zlib压缩级别（0表示仅存储）
+        date_time: 条目修改时间
+    """
+    if level == 0:
+        return ZipEntry(name, data, zlib.crc32(data), len(data), 0, date_time)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    return ZipEntry(name, compressed, zlib.crc32(data), len(data), zlib.DEFLATED, date_time)
+
+
+def read_raw_entries(path):
+    """
+    读取ZIP归档中所有条目的原始压缩数据（不解压、不重新压缩）
+    
+    存储或deflate压缩的条目直接复制压缩后的字节；其他压缩方式或加密的条目解压后重新压缩。
+    
+    Returns:
+        ZipEntry列表（保持归档中的原有顺序）
+    """
+    entries = []
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) and not info.flag_bits & 0x1:
+                f.seek(info.header_offset)
+                header = f.read(LOCAL_HEADER.size)
+                fields = LOCAL_HEADER.unpack(header)
+                if fields[0] != LOCAL_SIGNATURE:
+                    raise zipfile.BadZipFile(f"条目头损坏: {info.filename}")
+                # 跳过本地文件头中的文件名和扩展字段
+                f.seek(fields[9] + fields[10], 1)
+                data = f.read(info.compress_size)
+                entries.append(ZipEntry(info.filename, data, info.CRC, info.file_size,
+                                        info.compress_type, info.date_time))
+            else:
+                entries.append(deflate_entry(info.filename, archive.read(info.filename),
+                                             date_time=info.date_time))
+    return entries
+
+
+def _dos_time(date_time):
+    """转换为ZIP使用的DOS日期和时间"""
+    year, month, day, hour, minute, second = date_time
+    dos_date = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dos_time = hour << 11 | minute << 5 | second // 2
+    return dos_date, dos_time
+
+
+def write_zip(target, entries):
+    """
+    将已压缩的条目写成ZIP归档
+    
+    Args:
+        target: 文件路径或可写的文件对象
+        entries: ZipEntry列表
+    """
+    if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+        with open(target, 'wb') as f:
+            write_zip(f, entries)
+        return
+
+    offset = 0
+    central = []
+    for entry in entries:
+        name = entry.name.encode('utf-8')
+        flags = UTF8_FLAG if not entry.name.isascii() else 0
+        dos_date, dos_time = _dos_time(entry.date_time)
+        header = LOCAL_HEADER.pack(
+            LOCAL_SIGNATURE, VERSION, flags, entry.method, dos_time, dos_date,
+            entry.crc, len(entry.data), entry.file_size, len(name), 0
+        )
+        target.write(header)
+        target.write(name)
+        target.write(entry.data)
+        central.append(CENTRAL_HEADER.pack(
+            CENTRAL_SIGNATURE, VERSION, VERSION, flags, entry.method, dos_time, dos_date,
+            entry.crc, len(entry.data), entry.file_size, len(name), 0, 0, 0, 0, 0, offset
+        ) + name)
+        offset += len(header) + len(name) + len(entry.data)
+
+    directory = b''.join(central)
+    target.write(directory)
+    target.write(END_RECORD.pack(
+        END_SIGNATURE, 0, 0, len(central), len(central), len(directory), offset, 0
+    ))
@@ -0,0 +1,60 @@
+import io
+import zipfile
+import pytest
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import XmlPart
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from src.template import load_template
+
+
+def paragraph_texts(data):
+    """返回文档中每个段落的全部文本（包括超链接中的文本）"""
+    document = Document(io.BytesIO(data))
+    return [''.join(t.text or '' for t in p._p.iter(qn('w:t'))) for p in document.paragraphs]
+
+
+@pytest.mark.parametrize('engine', ['xml', 'docx'])
+def test_placeholder_does_not_cross_hyperlink(tmp_path, engine):
+    """超链接两侧的文本不能拼成替换项"""
+    document = Document()
+    paragraph = document.add_paragraph()
+    paragraph.add_run('客户')
+    paragraph._p.append(parse_xml(
+        f'<w:hyperlink {nsdecls("w")}><w:r><w:t>LINK</w:t></w:r></w:hyperlink>'))
+    paragraph.add_run('名称')
+    document.add_paragraph('客户名称')
+    path = tmp_path / 'template.docx'
+    document.save(path)
+
+    template = load_template(str(path), ['客户名称'], engine=engine)
+    buffer = io.BytesIO()
+    template.save({'客户名称': 'VAL'}, buffer)
+
+    assert paragraph_texts(buffer.getvalue()) == ['客户LINK名称', 'VAL']
+
+
+@pytest.mark.parametrize('engine', ['xml', 'docx'])
+def test_placeholder_in_footnotes(tmp_path, engine):
+    """脚注中的替换项同样被替换"""
+    document = Document()
+    document.add_paragraph('正文客户名称')
+    footnotes = XmlPart(
+        PackURI('/word/footnotes.xml'), CT.WML_FOOTNOTES,
+        parse_xml(f'<w:footnotes {nsdecls("w")}><w:footnote w:id="1"><w:p>'
+                  f'<w:r><w:t>脚注客户名称</w:t></w:r></w:p></w:footnote></w:footnotes>'),
+        document.part.package)
+    document.part.relate_to(footnotes, RT.FOOTNOTES)
+    path = tmp_path / 'template.docx'
+    document.save(path)
+
+    template = load_template(str(path), ['客户名称'], engine=engine)
+    buffer = io.BytesIO()
+    template.save({'客户名称': 'VAL'}, buffer)
+
+    with zipfile.ZipFile(buffer) as archive:
+        xml = archive.read('word/footnotes.xml').decode('utf-8')
+    assert '脚注VAL' in xml and '客户名称' not in xml
+    assert paragraph_texts(buffer.getvalue()) == ['正文VAL']